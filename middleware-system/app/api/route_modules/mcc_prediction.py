@@ -4,12 +4,18 @@ Provides comprehensive merchant category code prediction using multiple data sou
 """
 
 import asyncio
+import functools
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import timedelta
 import json
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request, Response
 from pydantic import BaseModel, Field
 
 from ...services.location_service import LocationService
@@ -19,13 +25,45 @@ from ...services.historical_service import HistoricalService
 from ...services.llm_service import LLMService
 from ...services.prediction_service import prediction_service  # NEW: Enhanced prediction service
 from ...services.pos_terminal_service import pos_terminal_service  # NEW: POS terminal service
-# from ...core.cache import get_redis  # Commented out - module doesn't exist
+from ...core.cache import cache_get_json, cache_set_json
+from ...core.clock import now_iso
 from ...core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/mcc", tags=["MCC Prediction"])
 
+# Short TTL for fallback predictions so failing upstreams are not hammered but recover quickly
+_FALLBACK_CACHE_SECONDS = 60
+
+# Consensus weight for each prediction method
+_METHOD_WEIGHTS = MappingProxyType({
+    'llm_enhanced_consensus': 1.0,  # Highest weight for LLM enhanced
+    'location_analysis': 0.8,
+    'fingerprint_analysis': 0.7,
+    'terminal_analysis': 0.9,
+    'historical_analysis': 0.6
+})
+
+# Sources whose high-confidence answer ends the fan-out early
+_DECISIVE_METHODS = frozenset({'terminal_analysis', 'location_analysis'})
+
+# In-process cache of recent responses in front of Redis
+_LOCAL_CACHE_SIZE = 10_000
+_LOCAL_CACHE_SECONDS = 300
+
+# Concurrent LLM enhancements arriving within this window share one completion, up to _LLM_BATCH_MAX
+_LLM_BATCH_WINDOW_SECONDS = 0.020
+_LLM_BATCH_MAX = 16
+
+# Upper bound on /predict/batch size
+_MAX_BATCH_SIZE = 20
+
+@functools.lru_cache(maxsize=10_000)
+def _normalize_merchant_name(name: str) -> str:
+    """Lowercase a merchant name and collapse whitespace so spelling variants share cache entries"""
+    return ' '.join(name.lower().split())
+
 # Request/Response Models
 class WiFiNetwork(BaseModel):
     """WiFi network information"""
@@ -89,12 +127,32 @@ class MCCOrchestrator:
     
     def __init__(self):
         self.services_initialized = False
+        self._init_task: Optional[asyncio.Future] = None  # Shared by every caller, runs once
+        self._inflight: Dict[str, asyncio.Future] = {}  # cache key -> prediction already running
+        # cache key -> (expiry monotonic_ns, response), least recently used first
+        self._local_cache: OrderedDict[str, Tuple[int, MCCPredictionResponse]] = OrderedDict()
+        # LLM enhancements waiting for the current batch window as (merchant_data, predictions, context, future)
+        self._llm_pending: List[Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any], asyncio.Future]] = []
+        self._llm_flush_handle: Optional[asyncio.TimerHandle] = None
+        self._llm_batches: set = set()  # Running batch tasks, referenced until done
+        self._cache_writes: set = set()  # Redis writes running in the background, referenced until done
         
     async def initialize_services(self):
-        """Initialize all prediction services"""
-        if self.services_initialized:
-            return
-            
+        """Initialize all prediction services, sharing one run between concurrent callers"""
+        # No await between the check and the assignment, so only one initialization is ever started
+        if self._init_task is None:
+            self._init_task = asyncio.ensure_future(self._do_init())
+        init_task = self._init_task
+        try:
+            await asyncio.shield(init_task)
+        except Exception:
+            # Let the next caller retry a failed initialization
+            if self._init_task is init_task:
+                self._init_task = None
+            raise
+    
+    async def _do_init(self):
+        """Initialize all prediction services in parallel"""
         try:
             # Initialize services in parallel
             await asyncio.gather(
@@ -112,73 +170,209 @@ class MCCOrchestrator:
             logger.info("All MCC prediction services initialized")
             
         except Exception as e:
-            logger.error(f"Error initializing services: {str(e)}")
+            logger.error("Error initializing services: %s", e)
             raise
     
     async def predict_mcc(self, request: MCCPredictionRequest) -> MCCPredictionResponse:
         """
         Orchestrate comprehensive MCC prediction using all available services
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
+        
+        # Repeat queries for the same spot are served from the shared cache
+        cache_key = self._cache_key(request)
+        if not cache_key:
+            return await self._predict_and_cache(request, None, start_ns)
         
+        response = self._local_get(cache_key)
+        if response is not None:
+            return response.model_copy(update={'processing_time_ms': (time.perf_counter_ns() - start_ns) // 1_000_000})
+        
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            response = MCCPredictionResponse(**cached)
+            self._local_put(cache_key, response)
+            return response.model_copy(update={'processing_time_ms': (time.perf_counter_ns() - start_ns) // 1_000_000})
+        
+        # Concurrent identical requests share one in-flight prediction
+        fut = self._inflight.get(cache_key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._predict_and_cache(request, cache_key, start_ns))
+            self._inflight[cache_key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # Shield so one disconnected client does not cancel the prediction for the others
+        return await asyncio.shield(fut)
+    
+    async def _predict_and_cache(self, request: MCCPredictionRequest, cache_key: Optional[str],
+                                 start_ns: int) -> MCCPredictionResponse:
+        """Run the full prediction and store it under cache_key"""
         try:
             # Ensure services are initialized
             await self.initialize_services()
             
-            # Gather predictions from all sources in parallel
-            predictions = await self._gather_predictions(request)
+            # Gather predictions from all sources in parallel, overlapping the LLM when enabled
+            predictions = await self._gather_predictions(request, with_llm=request.use_llm_enhancement)
             
-            # Apply LLM enhancement if enabled
-            if request.use_llm_enhancement and predictions:
-                enhanced_prediction = await self._apply_llm_enhancement(request, predictions)
-                if enhanced_prediction.get('enhancement_applied'):
-                    predictions.append(enhanced_prediction)
+            return self._build_response(request, predictions, start_ns, cache_key)
             
-            # Calculate consensus
-            final_prediction = self._calculate_consensus(predictions)
+        except Exception as e:
+            logger.error("Error in MCC prediction orchestration: %s", e)
+            raise HTTPException(status_code=500, detail=f"MCC prediction failed: {str(e)}")
+    
+    async def predict_batch(self, requests: List[MCCPredictionRequest]) -> List[MCCPredictionResponse]:
+        """
+        Predict MCCs for many requests with one concurrent service fan-out and batched LLM calls
+        """
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            await self.initialize_services()
             
-            # Generate alternatives if requested
-            alternatives = []
-            if request.include_alternatives:
-                alternatives = self._generate_alternatives(predictions, final_prediction)
+            # Serve what we can from the local cache, then the shared one
+            cache_keys = [self._cache_key(request) for request in requests]
+            responses: List[Optional[MCCPredictionResponse]] = [
+                self._local_get(key) if key else None for key in cache_keys
+            ]
+            remote_keys = [key for key, response in zip(cache_keys, responses) if key and response is None]
+            cached = await asyncio.gather(*(cache_get_json(key) for key in remote_keys))
+            cached_by_key = dict(zip(remote_keys, cached))
             
-            # Calculate processing time
-            processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+            for i, key in enumerate(cache_keys):
+                if responses[i] is None and key and cached_by_key.get(key) is not None:
+                    responses[i] = MCCPredictionResponse(**cached_by_key[key])
+                    self._local_put(key, responses[i])
             
-            return MCCPredictionResponse(
-                predicted_mcc=final_prediction['mcc'],
-                confidence=final_prediction['confidence'],
-                method=final_prediction['method'],
-                prediction_sources=predictions,
-                consensus_score=final_prediction.get('consensus_score', 0.0),
-                processing_time_ms=processing_time,
-                alternatives=alternatives if alternatives else None,
-                llm_analysis=final_prediction.get('llm_analysis'),
-                enhancement_applied=final_prediction.get('enhancement_applied', False)
-            )
+            # Hand out copies so callers never share the cached objects
+            processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
+            responses = [
+                response.model_copy(update={'processing_time_ms': processing_time}) if response is not None else None
+                for response in responses
+            ]
+            
+            # Gather service predictions for every miss at once
+            pending = [i for i, response in enumerate(responses) if response is None]
+            all_predictions = await asyncio.gather(*(
+                self._gather_predictions(requests[i]) for i in pending
+            ))
+            
+            # One LLM round trip per chunk of requests that want enhancement
+            llm_slots = [
+                slot for slot, i in enumerate(pending)
+                if requests[i].use_llm_enhancement and all_predictions[slot]
+                and not any(map(self._is_decisive, all_predictions[slot]))
+                and not self._is_confident_consensus(all_predictions[slot])
+            ]
+            if llm_slots:
+                llm_inputs = [self._llm_inputs(requests[pending[slot]], all_predictions[slot]) for slot in llm_slots]
+                # Chunks of _LLM_BATCH_MAX keep each completion within the model's output limit
+                chunks = [range(start, min(start + _LLM_BATCH_MAX, len(llm_slots)))
+                          for start in range(0, len(llm_slots), _LLM_BATCH_MAX)]
+                chunk_results = await asyncio.gather(*(
+                    llm_service.enhance_mcc_prediction_batch(
+                        [llm_inputs[j][0] for j in chunk],
+                        [all_predictions[llm_slots[j]] for j in chunk],
+                        [llm_inputs[j][1] for j in chunk]
+                    )
+                    for chunk in chunks
+                ))
+                enhanced_predictions = [result for results in chunk_results for result in results]
+                for slot, enhanced_prediction in zip(llm_slots, enhanced_predictions):
+                    if enhanced_prediction.get('enhancement_applied'):
+                        all_predictions[slot].append(enhanced_prediction)
+            
+            for slot, i in enumerate(pending):
+                responses[i] = self._build_response(requests[i], all_predictions[slot], start_ns, cache_keys[i])
+            
+            return responses
             
         except Exception as e:
-            logger.error(f"Error in MCC prediction orchestration: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"MCC prediction failed: {str(e)}")
+            logger.error("Error in batch MCC prediction: %s", e)
+            raise HTTPException(status_code=500, detail=f"Batch MCC prediction failed: {str(e)}")
     
-    async def _gather_predictions(self, request: MCCPredictionRequest) -> List[Dict[str, Any]]:
-        """Gather predictions from all available services"""
+    def _build_response(self, request: MCCPredictionRequest, predictions: List[Dict[str, Any]],
+                        start_ns: int, cache_key: Optional[str]) -> MCCPredictionResponse:
+        """Turn gathered predictions into a response and cache it"""
+        # Calculate consensus
+        final_prediction = self._calculate_consensus(predictions)
         
-        # Prepare common context
-        context = {
-            'latitude': request.latitude,
-            'longitude': request.longitude,
-            'merchant_name': request.merchant_name,
-            'terminal_id': request.terminal_id,
-            'transaction_amount': request.transaction_amount,
-            'transaction_time': request.transaction_time,
-            'radius': request.radius
-        }
+        # Generate alternatives if requested
+        alternatives = []
+        if request.include_alternatives:
+            alternatives = self._generate_alternatives(predictions, final_prediction)
+        
+        # Calculate processing time
+        processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
+        
+        response = MCCPredictionResponse(
+            predicted_mcc=final_prediction['mcc'],
+            confidence=final_prediction['confidence'],
+            method=final_prediction['method'],
+            prediction_sources=predictions,
+            consensus_score=final_prediction.get('consensus_score', 0.0),
+            processing_time_ms=processing_time,
+            alternatives=alternatives if alternatives else None,
+            llm_analysis=final_prediction.get('llm_analysis'),
+            enhancement_applied=final_prediction.get('enhancement_applied', False)
+        )
+        
+        if cache_key:
+            ttl = _FALLBACK_CACHE_SECONDS if response.predicted_mcc == '5999' else settings.LOCATION_CACHE_HOURS * 3600
+            self._local_put(cache_key, response)
+            # Respond without waiting on Redis
+            task = asyncio.ensure_future(cache_set_json(cache_key, response.model_dump(), ttl))
+            self._cache_writes.add(task)
+            task.add_done_callback(self._cache_writes.discard)
+        
+        return response
+    
+    def _local_get(self, cache_key: str) -> Optional[MCCPredictionResponse]:
+        """Get a response from the in-process cache, or None on miss or expiry"""
+        entry = self._local_cache.get(cache_key)
+        if entry is None:
+            return None
+        expires_ns, response = entry
+        if time.monotonic_ns() >= expires_ns:
+            del self._local_cache[cache_key]
+            return None
+        self._local_cache.move_to_end(cache_key)
+        return response
+    
+    def _local_put(self, cache_key: str, response: MCCPredictionResponse):
+        """Store a response in the in-process cache, evicting the least recently used entry when full"""
+        ttl = _FALLBACK_CACHE_SECONDS if response.predicted_mcc == '5999' else _LOCAL_CACHE_SECONDS
+        self._local_cache[cache_key] = (time.monotonic_ns() + ttl * 1_000_000_000, response)
+        self._local_cache.move_to_end(cache_key)
+        if len(self._local_cache) > _LOCAL_CACHE_SIZE:
+            self._local_cache.popitem(last=False)
+    
+    def _cache_key(self, request: MCCPredictionRequest) -> Optional[str]:
+        """Cache key for a prediction request, or None if it should not be cached"""
+        # WiFi/BLE scans are per-device snapshots and rarely repeat exactly
+        if request.wifi_ssids or request.bluetooth_devices:
+            return None
+        
+        # 4 decimal places is roughly 11m
+        key = (
+            f"mcc:predict:{round(request.latitude, 4)}:{round(request.longitude, 4)}:"
+            f"{_normalize_merchant_name(request.merchant_name or '')}:{request.terminal_id or ''}:"
+            f"{request.radius}:{int(bool(request.use_llm_enhancement))}:"
+            f"{int(bool(request.include_alternatives))}"
+        )
+
+        # The LLM sees the amount and time, so its answer is only reusable for the same ones
+        if request.use_llm_enhancement:
+            key += f":{request.transaction_amount}:{request.transaction_time or ''}"
+
+        return key
+    
+    async def _gather_predictions(self, request: MCCPredictionRequest,
+                                  with_llm: bool = False) -> List[Dict[str, Any]]:
+        """Gather predictions from all available services, optionally with LLM enhancement"""
         
         # Define prediction tasks
         tasks = []
         
-        # Location-based prediction
+        # Location-based prediction (always first - the LLM starts from it)
         tasks.append(self._safe_predict_location(request))
         
         # Terminal-based prediction (if terminal_id provided)
@@ -192,63 +386,173 @@ class MCCOrchestrator:
         # Historical pattern prediction
         tasks.append(self._safe_predict_historical(request))
         
-        # Execute all predictions in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Execute all predictions in parallel, stopping early once one source is decisive
+        running = []
+        llm_task: Optional[asyncio.Task] = None
+        
+        def cancel_if_decisive(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is None and self._is_decisive(task.result()):
+                for other in running:
+                    other.cancel()
         
-        # Filter out failed predictions and exceptions
-        predictions = []
-        for result in results:
-            if isinstance(result, dict) and result.get('mcc'):
-                predictions.append(result)
-            elif isinstance(result, Exception):
-                logger.warning(f"Prediction service failed: {str(result)}")
+        def start_llm(task: asyncio.Task):
+            # Start the LLM off the location prediction so its latency overlaps the other sources
+            nonlocal llm_task
+            if task.cancelled() or task.exception() is not None:
+                return
+            result = task.result()
+            if isinstance(result, dict) and result.get('mcc') and not self._is_decisive(result):
+                llm_task = asyncio.ensure_future(self._apply_llm_enhancement(request, [result]))
+                running.append(llm_task)
         
-        return predictions
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for i, coro in enumerate(tasks):
+                    task = tg.create_task(coro)
+                    task.add_done_callback(cancel_if_decisive)
+                    if with_llm and i == 0:
+                        task.add_done_callback(start_llm)
+                    running.append(task)
+            
+            # Keep the predictions that finished; cancelled and failed sources are dropped
+            predictions = []
+            for task in running:
+                if task is llm_task or task.cancelled():
+                    continue
+                result = task.result()
+                if isinstance(result, dict) and result.get('mcc'):
+                    predictions.append(result)
+            
+            # The LLM adds nothing when a source is decisive or every source already agrees confidently
+            if (not with_llm or not predictions or any(map(self._is_decisive, predictions))
+                    or self._is_confident_consensus(predictions)):
+                return predictions
+            
+            if llm_task is not None:
+                await asyncio.wait((llm_task,))
+                enhanced_prediction = None if llm_task.cancelled() else llm_task.result()
+            else:
+                # No usable location prediction - fall back to enhancing what the other sources found
+                enhanced_prediction = await self._apply_llm_enhancement(request, predictions)
+            
+            if enhanced_prediction and enhanced_prediction.get('enhancement_applied'):
+                predictions.append(enhanced_prediction)
+            
+            return predictions
+        finally:
+            if llm_task is not None and not llm_task.done():
+                llm_task.cancel()
+    
+    def _is_decisive(self, prediction: Any) -> bool:
+        """Whether a single source prediction is confident enough to skip the rest"""
+        return (
+            isinstance(prediction, dict)
+            and bool(prediction.get('mcc'))
+            and prediction.get('method') in _DECISIVE_METHODS
+            and prediction.get('confidence', 0) >= settings.HIGH_CONFIDENCE_THRESHOLD
+        )
+    
+    def _is_confident_consensus(self, predictions: List[Dict[str, Any]]) -> bool:
+        """Whether all sources agree on one MCC and the best of them is highly confident"""
+        first_mcc = predictions[0]['mcc']
+        return (
+            all(p['mcc'] == first_mcc for p in predictions)
+            and max(p.get('confidence', 0) for p in predictions) >= settings.HIGH_CONFIDENCE_THRESHOLD
+        )
     
     async def _apply_llm_enhancement(self, request: MCCPredictionRequest, 
                                    predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Apply LLM enhancement to improve prediction accuracy"""
         try:
-            # Prepare merchant data for LLM analysis
-            merchant_data = {
-                'merchant_name': request.merchant_name or '',
-                'business_description': '',
-                'location_info': {
-                    'latitude': request.latitude,
-                    'longitude': request.longitude
-                },
-                'venue_types': []
-            }
-            
-            # Extract venue information from location predictions
-            for pred in predictions:
-                if pred.get('method') == 'location_analysis' and 'venue_data' in pred:
-                    venue_data = pred['venue_data']
-                    if 'description' in venue_data:
-                        merchant_data['business_description'] = venue_data['description']
-                    if 'categories' in venue_data:
-                        merchant_data['venue_types'] = venue_data['categories']
-                    break
-            
-            # Prepare context
-            context = {
-                'transaction_amount': request.transaction_amount,
-                'transaction_time': request.transaction_time,
-                'radius': request.radius,
-                'data_sources_used': [pred.get('method', 'unknown') for pred in predictions]
-            }
+            merchant_data, context = self._llm_inputs(request, predictions)
             
-            # Get LLM enhancement
-            enhanced_result = await llm_service.enhance_mcc_prediction(
-                merchant_data, predictions, context
-            )
+            # Queue for the current batch window; the batch is sent when the window closes or fills up
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            self._llm_pending.append((merchant_data, predictions, context, fut))
+            if len(self._llm_pending) >= _LLM_BATCH_MAX:
+                self._flush_llm_batch()
+            elif self._llm_flush_handle is None:
+                self._llm_flush_handle = loop.call_later(_LLM_BATCH_WINDOW_SECONDS, self._flush_llm_batch)
             
-            return enhanced_result
+            # Shield so a cancelled caller does not fail the rest of its batch
+            return await asyncio.shield(fut)
             
         except Exception as e:
-            logger.error(f"LLM enhancement failed: {str(e)}")
+            logger.error("LLM enhancement failed: %s", e)
             return {'enhancement_applied': False, 'error': str(e)}
     
+    def _flush_llm_batch(self):
+        """Send every queued LLM enhancement as one batch"""
+        if self._llm_flush_handle is not None:
+            self._llm_flush_handle.cancel()
+            self._llm_flush_handle = None
+        batch, self._llm_pending = self._llm_pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_llm_batch(batch))
+            self._llm_batches.add(task)
+            task.add_done_callback(self._llm_batches.discard)
+    
+    async def _run_llm_batch(self, batch: List[Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any], asyncio.Future]]):
+        """Run one LLM completion for a batch and hand each caller its result"""
+        try:
+            try:
+                if len(batch) == 1:
+                    merchant_data, predictions, context, _ = batch[0]
+                    results = [await llm_service.enhance_mcc_prediction(merchant_data, predictions, context)]
+                else:
+                    results = await llm_service.enhance_mcc_prediction_batch(
+                        [item[0] for item in batch],
+                        [item[1] for item in batch],
+                        [item[2] for item in batch]
+                    )
+            except Exception as e:
+                logger.error("LLM enhancement batch of %d failed: %s", len(batch), e)
+                results = [{'enhancement_applied': False, 'error': str(e)}] * len(batch)
+            
+            for (*_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+        finally:
+            # Never leave a caller waiting, e.g. if the batch is cancelled at shutdown
+            for *_, fut in batch:
+                if not fut.done():
+                    fut.cancel()
+    
+    def _llm_inputs(self, request: MCCPredictionRequest,
+                    predictions: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the merchant data and context passed to the LLM"""
+        # Prepare merchant data for LLM analysis
+        merchant_data = {
+            'merchant_name': request.merchant_name or '',
+            'business_description': '',
+            'location_info': {
+                'latitude': request.latitude,
+                'longitude': request.longitude
+            },
+            'venue_types': []
+        }
+        
+        # Extract venue information from location predictions
+        for pred in predictions:
+            if pred.get('method') == 'location_analysis' and 'venue_data' in pred:
+                venue_data = pred['venue_data']
+                if 'description' in venue_data:
+                    merchant_data['business_description'] = venue_data['description']
+                if 'categories' in venue_data:
+                    merchant_data['venue_types'] = venue_data['categories']
+                break
+        
+        # Prepare context
+        context = {
+            'transaction_amount': request.transaction_amount,
+            'transaction_time': request.transaction_time,
+            'radius': request.radius,
+            'data_sources_used': [pred.get('method', 'unknown') for pred in predictions]
+        }
+        
+        return merchant_data, context
+    
     async def _safe_predict_location(self, request: MCCPredictionRequest) -> Dict[str, Any]:
         """Safely execute location-based prediction"""
         try:
@@ -265,7 +569,7 @@ class MCCOrchestrator:
             result['method'] = 'location_analysis'
             return result
         except Exception as e:
-            logger.error(f"Location prediction failed: {str(e)}")
+            logger.error("Location prediction failed: %s", e)
             return {'error': str(e), 'method': 'location_analysis'}
     
     async def _safe_predict_terminal(self, request: MCCPredictionRequest) -> Dict[str, Any]:
@@ -278,7 +582,7 @@ class MCCOrchestrator:
                 return result
             return {'error': 'No terminal prediction available', 'method': 'terminal_analysis'}
         except Exception as e:
-            logger.error(f"Terminal prediction failed: {str(e)}")
+            logger.error("Terminal prediction failed: %s", e)
             return {'error': str(e), 'method': 'terminal_analysis'}
     
     async def _safe_predict_fingerprint(self, request: MCCPredictionRequest) -> Dict[str, Any]:
@@ -291,7 +595,7 @@ class MCCOrchestrator:
             result['method'] = 'fingerprint_analysis'
             return result
         except Exception as e:
-            logger.error(f"Fingerprint prediction failed: {str(e)}")
+            logger.error("Fingerprint prediction failed: %s", e)
             return {'error': str(e), 'method': 'fingerprint_analysis'}
     
     async def _safe_predict_historical(self, request: MCCPredictionRequest) -> Dict[str, Any]:
@@ -306,7 +610,7 @@ class MCCOrchestrator:
                 return result
             return {'error': 'No historical prediction available', 'method': 'historical_analysis'}
         except Exception as e:
-            logger.error(f"Historical prediction failed: {str(e)}")
+            logger.error("Historical prediction failed: %s", e)
             return {'error': str(e), 'method': 'historical_analysis'}
     
     def _calculate_consensus(self, predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -319,17 +623,9 @@ class MCCOrchestrator:
                 'consensus_score': 0.0
             }
         
-        # Weight different prediction methods
-        method_weights = {
-            'llm_enhanced_consensus': 1.0,  # Highest weight for LLM enhanced
-            'location_analysis': 0.8,
-            'fingerprint_analysis': 0.7,
-            'terminal_analysis': 0.9,
-            'historical_analysis': 0.6
-        }
-        
-        # Calculate weighted scores for each MCC
-        mcc_scores = {}
+        # Calculate weighted scores for each MCC, tracking each MCC's strongest contributor
+        mcc_scores = defaultdict(float)
+        best_contribution = {}  # mcc -> (weighted score, prediction)
         total_weight = 0
         
         for pred in predictions:
@@ -339,15 +635,17 @@ class MCCOrchestrator:
             mcc = pred['mcc']
             confidence = pred.get('confidence', 0.5)
             method = pred.get('method', 'unknown')
-            weight = method_weights.get(method, 0.5)
+            weight = _METHOD_WEIGHTS.get(method, 0.5)
             
             # Boost score for LLM enhanced predictions
             if pred.get('enhancement_applied'):
                 weight *= 1.2
             
             weighted_score = confidence * weight
-            mcc_scores[mcc] = mcc_scores.get(mcc, 0) + weighted_score
+            mcc_scores[mcc] += weighted_score
             total_weight += weight
+            if mcc not in best_contribution or weighted_score > best_contribution[mcc][0]:
+                best_contribution[mcc] = (weighted_score, pred)
         
         if not mcc_scores:
             return {
@@ -357,16 +655,10 @@ class MCCOrchestrator:
                 'consensus_score': 0.0
             }
         
-        # Find best MCC
-        best_mcc = max(mcc_scores, key=mcc_scores.get)
+        # Find best MCC and the prediction that contributed most to it
+        best_mcc = max(mcc_scores, key=mcc_scores.__getitem__)
         consensus_score = mcc_scores[best_mcc] / total_weight if total_weight > 0 else 0
-        
-        # Find the prediction that contributed most to this MCC
-        best_prediction = None
-        for pred in predictions:
-            if pred.get('mcc') == best_mcc:
-                best_prediction = pred
-                break
+        best_prediction = best_contribution[best_mcc][1]
         
         return {
             'mcc': best_mcc,
@@ -418,7 +710,23 @@ async def predict_mcc(request: MCCPredictionRequest):
     try:
         return await orchestrator.predict_mcc(request)
     except Exception as e:
-        logger.error(f"MCC prediction failed: {str(e)}")
+        logger.error("MCC prediction failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/batch", response_model=List[MCCPredictionResponse])
+async def predict_mcc_batch(requests: List[MCCPredictionRequest]):
+    """
+    Batch MCC prediction - service lookups run concurrently and LLM enhancement is a single call
+    """
+    if len(requests) > _MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size cannot exceed {_MAX_BATCH_SIZE}")
+    
+    try:
+        return await orchestrator.predict_batch(requests)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch MCC prediction failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/predict/enhanced", response_model=MCCPredictionResponse)
@@ -427,8 +735,8 @@ async def predict_mcc_enhanced(request: MCCPredictionRequest):
     Enhanced MCC prediction using the new prediction service with POS terminal detection
     """
     try:
-        # Initialize prediction service
-        await prediction_service.initialize()
+        # Services are initialized once at startup; this only waits if that is still running
+        await orchestrator.initialize_services()
         
         # Convert request data to prediction service format
         prediction_data = {
@@ -569,7 +877,7 @@ async def predict_mcc_enhanced(request: MCCPredictionRequest):
             )
             
     except Exception as e:
-        logger.error(f"Enhanced MCC prediction failed: {str(e)}")
+        logger.error("Enhanced MCC prediction failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Enhanced prediction failed: {str(e)}")
 
 @router.post("/detect/pos-terminals")
@@ -581,8 +889,8 @@ async def detect_pos_terminals(
     Direct POS terminal detection from BLE beacon data
     """
     try:
-        # Initialize POS terminal service
-        await pos_terminal_service.initialize()
+        # Services are initialized once at startup; this only waits if that is still running
+        await orchestrator.initialize_services()
         
         # Convert BLE beacon data
         ble_data = [
@@ -612,21 +920,22 @@ async def detect_pos_terminals(
         }
         
     except Exception as e:
-        logger.error(f"POS terminal detection failed: {str(e)}")
+        logger.error("POS terminal detection failed: %s", e)
         raise HTTPException(status_code=500, detail=f"POS detection failed: {str(e)}")
 
 @router.get("/predict/simple")
 async def predict_mcc_simple(
-    latitude: float = Query(..., description="Latitude coordinate"),
-    longitude: float = Query(..., description="Longitude coordinate"),
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude coordinate"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude coordinate"),
     merchant_name: Optional[str] = Query(None, description="Merchant name"),
-    radius: Optional[int] = Query(200, description="Search radius in meters"),
+    radius: Optional[int] = Query(200, ge=1, le=1000, description="Search radius in meters"),
     use_llm: Optional[bool] = Query(True, description="Use LLM enhancement")
 ):
     """
     Simple MCC prediction endpoint for quick integration
     """
-    request = MCCPredictionRequest(
+    # Query parameters carry the model's bounds, so skip validating them a second time
+    request = MCCPredictionRequest.model_construct(
         latitude=latitude,
         longitude=longitude,
         merchant_name=merchant_name,
@@ -682,76 +991,122 @@ async def resolve_prediction_conflicts(
         "service_available": result.get('method') != 'llm_disabled'
     }
 
+# Services reported by /health, in response order
+_HEALTH_SERVICES = (
+    ('location', location_service),
+    ('terminal', terminal_service),
+    ('fingerprint', fingerprint_service),
+    ('historical', historical_service),
+    ('llm', llm_service)
+)
+
+async def _get_service_status(service, service_name: str) -> Dict[str, Any]:
+    """Get a service's status, reporting failures instead of raising"""
+    try:
+        return await service.get_service_status()
+    except Exception as e:
+        return {
+            'service': service_name,
+            'status': 'error',
+            'error': str(e)
+        }
+
+def _etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def _conditional_json_response(request: Request, body: bytes, etag: str, max_age: int) -> Response:
+    """Serialized JSON with caching headers, or 304 when the client already has this body"""
+    headers = {"ETag": etag, "Cache-Control": f"max-age={max_age}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Load balancers poll /health often; serve a short-lived snapshot instead of re-polling every service
+_HEALTH_TTL_SECONDS = 5
+_health_snapshot: Optional[Tuple[float, bytes, str]] = None  # (monotonic time, body, etag)
+_health_refresh: Optional[asyncio.Future] = None  # Refresh shared by concurrent polls
+
+def _finish_health_refresh(_):
+    global _health_refresh
+    _health_refresh = None
+
 @router.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     Check health and status of all MCC prediction services
     """
-    await orchestrator.initialize_services()
+    global _health_refresh
+    snapshot = _health_snapshot
+    if snapshot is None or time.monotonic() - snapshot[0] >= _HEALTH_TTL_SECONDS:
+        if _health_refresh is None:
+            _health_refresh = asyncio.ensure_future(_collect_health())
+            _health_refresh.add_done_callback(_finish_health_refresh)
+        snapshot = await asyncio.shield(_health_refresh)
     
-    # Helper function to safely get service status
-    async def safe_get_status(service, service_name):
-        try:
-            if hasattr(service, 'get_service_status'):
-                return await service.get_service_status()
-            else:
-                # For services without get_service_status, check if they're initialized
-                return {
-                    'service': service_name,
-                    'status': 'available' if service else 'unavailable',
-                    'initialized': bool(service)
-                }
-        except Exception as e:
-            return {
+    _, body, etag = snapshot
+    return _conditional_json_response(request, body, etag, _HEALTH_TTL_SECONDS)
+
+async def _collect_health() -> Tuple[float, bytes, str]:
+    """Poll every MCC prediction service and store the health snapshot"""
+    global _health_snapshot
+    
+    # Only services with a real status call go through the event loop
+    services = {}
+    pending = {}
+    for service_name, service in _HEALTH_SERVICES:
+        if hasattr(service, 'get_service_status'):
+            pending[service_name] = _get_service_status(service, service_name)
+        else:
+            # For services without get_service_status, check if they're initialized
+            services[service_name] = {
                 'service': service_name,
-                'status': 'error',
-                'error': str(e)
+                'status': 'available' if service else 'unavailable',
+                'initialized': bool(service)
             }
     
-    # Gather service statuses safely
-    statuses = await asyncio.gather(
-        safe_get_status(location_service, 'location'),
-        safe_get_status(terminal_service, 'terminal'),
-        safe_get_status(fingerprint_service, 'fingerprint'),
-        safe_get_status(historical_service, 'historical'),
-        safe_get_status(llm_service, 'llm'),
-        return_exceptions=True
-    )
+    services.update(zip(pending, await asyncio.gather(*pending.values())))
     
-    return {
+    health = {
         "status": "healthy",
-        "services": {
-            "location": statuses[0] if not isinstance(statuses[0], Exception) else {"error": str(statuses[0])},
-            "terminal": statuses[1] if not isinstance(statuses[1], Exception) else {"error": str(statuses[1])},
-            "fingerprint": statuses[2] if not isinstance(statuses[2], Exception) else {"error": str(statuses[2])},
-            "historical": statuses[3] if not isinstance(statuses[3], Exception) else {"error": str(statuses[3])},
-            "llm": statuses[4] if not isinstance(statuses[4], Exception) else {"error": str(statuses[4])}
-        },
+        "services": {service_name: services[service_name] for service_name, _ in _HEALTH_SERVICES},
         "orchestrator_initialized": orchestrator.services_initialized,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
+    }
+    body = orjson.dumps(health)
+    _health_snapshot = (time.monotonic(), body, _etag(body))
+    return _health_snapshot
+
+# Settings are fixed for the life of the process, so the payload is built once
+_CONFIG_PAYLOAD = {
+    "services_enabled": {
+        "google_places": settings.GOOGLE_PLACES_ENABLED,
+        "foursquare": settings.FOURSQUARE_ENABLED,
+        "llm_enhancement": bool(settings.OPENAI_API_KEY)
+    },
+    "api_limits": {
+        "google_places_daily": settings.GOOGLE_PLACES_DAILY_LIMIT,
+        "foursquare_daily": settings.FOURSQUARE_DAILY_LIMIT
+    },
+    "cache_settings": {
+        "location_cache_hours": settings.LOCATION_CACHE_HOURS,
+        "terminal_cache_hours": settings.TERMINAL_CACHE_HOURS
+    },
+    "confidence_thresholds": {
+        "minimum_confidence": settings.MIN_CONFIDENCE_THRESHOLD,
+        "high_confidence": settings.HIGH_CONFIDENCE_THRESHOLD
     }
+}
+
+_CONFIG_BODY = orjson.dumps(_CONFIG_PAYLOAD)
+_CONFIG_ETAG = _etag(_CONFIG_BODY)
+
+# Config only changes on redeploy
+_CONFIG_MAX_AGE_SECONDS = 300
 
 @router.get("/config")
-async def get_configuration():
+async def get_configuration(request: Request):
     """
     Get current MCC prediction service configuration
     """
-    return {
-        "services_enabled": {
-            "google_places": settings.GOOGLE_PLACES_ENABLED,
-            "foursquare": settings.FOURSQUARE_ENABLED,
-            "llm_enhancement": bool(settings.OPENAI_API_KEY)
-        },
-        "api_limits": {
-            "google_places_daily": settings.GOOGLE_PLACES_DAILY_LIMIT,
-            "foursquare_daily": settings.FOURSQUARE_DAILY_LIMIT
-        },
-        "cache_settings": {
-            "location_cache_hours": settings.LOCATION_CACHE_HOURS,
-            "terminal_cache_hours": settings.TERMINAL_CACHE_HOURS
-        },
-        "confidence_thresholds": {
-            "minimum_confidence": settings.MIN_CONFIDENCE_THRESHOLD,
-            "high_confidence": settings.HIGH_CONFIDENCE_THRESHOLD
-        }
-    } 
\ No newline at end of file
+    return _conditional_json_response(request, _CONFIG_BODY, _CONFIG_ETAG, _CONFIG_MAX_AGE_SECONDS)
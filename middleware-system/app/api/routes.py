@@ -2,14 +2,18 @@
 FastAPI routes for Payvo middleware
 """
 
-from fastapi import APIRouter, HTTPException, Query, Body, Request
-from typing import Optional, Dict, List, Any
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response
+from types import MappingProxyType
+from typing import Optional
 import logging
 from datetime import datetime
 
+import orjson
+
 from app.models.schemas import (
-    APIResponse, TransactionFeedback, HealthCheck
+    APIResponse, TransactionFeedback, HealthCheck, PaymentActivationRequest
 )
+from app.core.clock import now_iso
 from app.services.routing_orchestrator import routing_orchestrator
 from app.api.route_modules.background_location import router as background_location_router
 from app.api.route_modules.auth import router as auth_router
@@ -18,6 +22,97 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Static reference data for /mcc/{mcc_code}/info, keyed by MCC
+_MCC_INFO_BY_CODE = {
+    "5812": {
+        "category": "Eating Places, Restaurants",
+        "description": "Full-service restaurants",
+        "typical_rewards": "2-4x points/cashback"
+    },
+    "5814": {
+        "category": "Fast Food Restaurants", 
+        "description": "Quick service restaurants",
+        "typical_rewards": "2-4x points/cashback"
+    },
+    "5411": {
+        "category": "Grocery Stores, Supermarkets",
+        "description": "Grocery and supermarket purchases",
+        "typical_rewards": "1-6x points/cashback"
+    },
+    "5541": {
+        "category": "Service Stations",
+        "description": "Gas stations and fuel purchases", 
+        "typical_rewards": "2-5x points/cashback"
+    },
+    "5732": {
+        "category": "Electronics Stores",
+        "description": "Consumer electronics retailers",
+        "typical_rewards": "1-2x points/cashback"
+    },
+    "5999": {
+        "category": "Miscellaneous Retail",
+        "description": "General retail and miscellaneous",
+        "typical_rewards": "1x points/cashback"
+    }
+}
+
+# Serialized APIResponse for each MCC up to the timestamp, which is appended per request
+_MCC_INFO_PREFIXES = MappingProxyType({
+    mcc_code: b'{"success":true,"data":' + orjson.dumps({"mcc_code": mcc_code, **info})
+              + b',"error":null,"timestamp":'
+    for mcc_code, info in _MCC_INFO_BY_CODE.items()
+})
+
+# Mock network acceptance data - would be from real analytics
+_NETWORK_ACCEPTANCE = {
+    "visa": {
+        "overall_acceptance": 99.8,
+        "by_category": {
+            "grocery": 99.9,
+            "gas": 99.8,
+            "restaurant": 99.9,
+            "retail": 99.7,
+            "travel": 99.9
+        }
+    },
+    "mastercard": {
+        "overall_acceptance": 99.7,
+        "by_category": {
+            "grocery": 99.8,
+            "gas": 99.7,
+            "restaurant": 99.8,
+            "retail": 99.6,
+            "travel": 99.8
+        }
+    },
+    "amex": {
+        "overall_acceptance": 87.2,
+        "by_category": {
+            "grocery": 92.1,
+            "gas": 83.4,
+            "restaurant": 91.8,
+            "retail": 85.7,
+            "travel": 98.2
+        }
+    },
+    "discover": {
+        "overall_acceptance": 82.5,
+        "by_category": {
+            "grocery": 89.3,
+            "gas": 78.2,
+            "restaurant": 85.1,
+            "retail": 80.4,
+            "travel": 79.8
+        }
+    }
+}
+
+# /networks/acceptance is static apart from last_updated, so serialize around it once
+_NETWORK_ACCEPTANCE_PREFIX = (
+    b'{"success":true,"data":{"networks":' + orjson.dumps(_NETWORK_ACCEPTANCE) + b',"last_updated":'
+)
+_NETWORK_ACCEPTANCE_SUFFIX = b'},"message":"Network acceptance rates retrieved successfully"}'
+
 # Include authentication routes
 router.include_router(auth_router, prefix="/api/v1")
 
@@ -90,13 +185,7 @@ async def initiate_card_routing(
 @router.post("/routing/{session_id}/activate", response_model=APIResponse)
 async def activate_payment_token(
     session_id: str,
-    location: Optional[Dict[str, Any]] = Body(default=None, description="Real-time GPS location data"),
-    terminal_id: Optional[str] = Body(default=None, description="Terminal ID if available"),
-    merchant_name: Optional[str] = Body(default=None, description="Merchant name if known"),
-    wifi_networks: Optional[List[Dict[str, Any]]] = Body(default=None, description="WiFi networks detected"),
-    ble_beacons: Optional[List[Dict[str, Any]]] = Body(default=None, description="BLE beacons detected"),
-    amount: Optional[float] = Body(default=None, description="Transaction amount"),
-    context_info: Optional[Dict[str, Any]] = Body(default=None, description="Additional context information")
+    body: Optional[PaymentActivationRequest] = None
 ):
     """
     Activate the payment token for the selected card with real-time location data
@@ -111,27 +200,31 @@ async def activate_payment_token(
     Real-time data significantly improves MCC prediction accuracy.
     """
     try:
+        body = body or PaymentActivationRequest()
+        location, wifi_networks, ble_beacons = body.location, body.wifi_networks, body.ble_beacons
+        
         # Prepare real payment data if provided
         payment_data = None
-        if any([location, terminal_id, merchant_name, wifi_networks, ble_beacons, amount, context_info]):
+        if (location or body.terminal_id or body.merchant_name or wifi_networks or ble_beacons
+                or body.amount or body.context_info):
             payment_data = {
                 "location": location or {},
-                "terminal_id": terminal_id,
-                "merchant_name": merchant_name,
+                "terminal_id": body.terminal_id,
+                "merchant_name": body.merchant_name,
                 "wifi_networks": wifi_networks or [],
                 "ble_beacons": ble_beacons or [],
-                "amount": amount,
-                "context_info": context_info or {}
+                "amount": body.amount,
+                "context_info": body.context_info or {}
             }
             
             # Log real-time data usage
-            logger.info(f"Received real-time payment data for session {session_id}")
+            logger.info("Received real-time payment data for session %s", session_id)
             if location and location.get("latitude") and location.get("longitude"):
-                logger.info(f"Real-time location provided: {location['latitude']:.6f}, {location['longitude']:.6f}")
+                logger.info("Real-time location provided: %.6f, %.6f", location['latitude'], location['longitude'])
             if wifi_networks:
-                logger.info(f"WiFi networks detected: {len(wifi_networks)} networks")
+                logger.info("WiFi networks detected: %d networks", len(wifi_networks))
             if ble_beacons:
-                logger.info(f"BLE beacons detected: {len(ble_beacons)} beacons")
+                logger.info("BLE beacons detected: %d beacons", len(ble_beacons))
         
         response = await routing_orchestrator.activate_payment(session_id, payment_data)
         
@@ -329,7 +422,7 @@ async def health_check():
             data={
                 "status": "degraded",
                 "version": "2.0.0",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
                 "components": {
                     "routing_orchestrator": "unavailable",
                     "database": "unknown",
@@ -358,50 +451,11 @@ async def get_mcc_info(mcc_code: str):
     """
     Get information about a specific MCC code
     """
-    mcc_info = {
-        "5812": {
-            "category": "Eating Places, Restaurants",
-            "description": "Full-service restaurants",
-            "typical_rewards": "2-4x points/cashback"
-        },
-        "5814": {
-            "category": "Fast Food Restaurants", 
-            "description": "Quick service restaurants",
-            "typical_rewards": "2-4x points/cashback"
-        },
-        "5411": {
-            "category": "Grocery Stores, Supermarkets",
-            "description": "Grocery and supermarket purchases",
-            "typical_rewards": "1-6x points/cashback"
-        },
-        "5541": {
-            "category": "Service Stations",
-            "description": "Gas stations and fuel purchases", 
-            "typical_rewards": "2-5x points/cashback"
-        },
-        "5732": {
-            "category": "Electronics Stores",
-            "description": "Consumer electronics retailers",
-            "typical_rewards": "1-2x points/cashback"
-        },
-        "5999": {
-            "category": "Miscellaneous Retail",
-            "description": "General retail and miscellaneous",
-            "typical_rewards": "1x points/cashback"
-        }
-    }
-    
-    info = mcc_info.get(mcc_code)
-    if not info:
+    prefix = _MCC_INFO_PREFIXES.get(mcc_code)
+    if prefix is None:
         raise HTTPException(status_code=404, detail="MCC code not found")
     
-    return APIResponse(
-        success=True,
-        data={
-            "mcc_code": mcc_code,
-            **info
-        }
-    )
+    return Response(content=prefix + orjson.dumps(datetime.utcnow()) + b'}', media_type="application/json")
 
 
 @router.get("/networks/acceptance")
@@ -415,58 +469,8 @@ async def get_network_acceptance_rates():
     - Transaction types
     """
     try:
-        # Mock network acceptance data - would be from real analytics
-        acceptance_data = {
-            "success": True,
-            "data": {
-                "networks": {
-                    "visa": {
-                        "overall_acceptance": 99.8,
-                        "by_category": {
-                            "grocery": 99.9,
-                            "gas": 99.8,
-                            "restaurant": 99.9,
-                            "retail": 99.7,
-                            "travel": 99.9
-                        }
-                    },
-                    "mastercard": {
-                        "overall_acceptance": 99.7,
-                        "by_category": {
-                            "grocery": 99.8,
-                            "gas": 99.7,
-                            "restaurant": 99.8,
-                            "retail": 99.6,
-                            "travel": 99.8
-                        }
-                    },
-                    "amex": {
-                        "overall_acceptance": 87.2,
-                        "by_category": {
-                            "grocery": 92.1,
-                            "gas": 83.4,
-                            "restaurant": 91.8,
-                            "retail": 85.7,
-                            "travel": 98.2
-                        }
-                    },
-                    "discover": {
-                        "overall_acceptance": 82.5,
-                        "by_category": {
-                            "grocery": 89.3,
-                            "gas": 78.2,
-                            "restaurant": 85.1,
-                            "retail": 80.4,
-                            "travel": 79.8
-                        }
-                    }
-                },
-                "last_updated": datetime.now().isoformat()
-            },
-            "message": "Network acceptance rates retrieved successfully"
-        }
-        
-        return acceptance_data
+        payload = _NETWORK_ACCEPTANCE_PREFIX + orjson.dumps(now_iso()) + _NETWORK_ACCEPTANCE_SUFFIX
+        return Response(content=payload, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Failed to get network acceptance rates: {e}")
@@ -606,7 +610,7 @@ async def test_payment_with_gps(
             "success": True,
             "data": response_data,
             "error": None,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
         
     except HTTPException:
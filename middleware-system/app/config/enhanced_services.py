@@ -3,9 +3,9 @@ Configuration settings for enhanced MCC prediction services
 Manages API keys, service settings, and feature flags
 """
 
-import os
 from typing import Dict, Any, Optional
 from decimal import Decimal
+from app.core.config import _as_bool, _get
 from app.utils.mcc_categories import get_all_mcc_categories
 
 
@@ -13,60 +13,60 @@ class EnhancedServicesConfig:
     """Configuration for enhanced MCC prediction services"""
     
     # Google Places API Configuration
-    GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
-    GOOGLE_PLACES_ENABLED = os.getenv("GOOGLE_PLACES_ENABLED", "false").lower() == "true"
-    GOOGLE_PLACES_RADIUS_METERS = int(os.getenv("GOOGLE_PLACES_RADIUS_METERS", "1"))
-    GOOGLE_PLACES_MAX_RESULTS = int(os.getenv("GOOGLE_PLACES_MAX_RESULTS", "20"))
+    GOOGLE_PLACES_API_KEY = _get("GOOGLE_PLACES_API_KEY", "")
+    GOOGLE_PLACES_ENABLED = _get("GOOGLE_PLACES_ENABLED", False, _as_bool)
+    GOOGLE_PLACES_RADIUS_METERS = _get("GOOGLE_PLACES_RADIUS_METERS", 1, int)
+    GOOGLE_PLACES_MAX_RESULTS = _get("GOOGLE_PLACES_MAX_RESULTS", 20, int)
     
     # Foursquare API Configuration
-    FOURSQUARE_API_KEY = os.getenv("FOURSQUARE_API_KEY", "")
-    FOURSQUARE_ENABLED = os.getenv("FOURSQUARE_ENABLED", "false").lower() == "true"
-    FOURSQUARE_RADIUS_METERS = int(os.getenv("FOURSQUARE_RADIUS_METERS", "1"))
-    FOURSQUARE_MAX_RESULTS = int(os.getenv("FOURSQUARE_MAX_RESULTS", "20"))
+    FOURSQUARE_API_KEY = _get("FOURSQUARE_API_KEY", "")
+    FOURSQUARE_ENABLED = _get("FOURSQUARE_ENABLED", False, _as_bool)
+    FOURSQUARE_RADIUS_METERS = _get("FOURSQUARE_RADIUS_METERS", 1, int)
+    FOURSQUARE_MAX_RESULTS = _get("FOURSQUARE_MAX_RESULTS", 20, int)
     
     # Cache Configuration
-    LOCATION_CACHE_TTL_HOURS = int(os.getenv("LOCATION_CACHE_TTL_HOURS", "24"))
-    TERMINAL_CACHE_TTL_HOURS = int(os.getenv("TERMINAL_CACHE_TTL_HOURS", "12"))
-    FINGERPRINT_CACHE_TTL_HOURS = int(os.getenv("FINGERPRINT_CACHE_TTL_HOURS", "6"))
-    HISTORICAL_CACHE_TTL_HOURS = int(os.getenv("HISTORICAL_CACHE_TTL_HOURS", "1"))
+    LOCATION_CACHE_TTL_HOURS = _get("LOCATION_CACHE_TTL_HOURS", 24, int)
+    TERMINAL_CACHE_TTL_HOURS = _get("TERMINAL_CACHE_TTL_HOURS", 12, int)
+    FINGERPRINT_CACHE_TTL_HOURS = _get("FINGERPRINT_CACHE_TTL_HOURS", 6, int)
+    HISTORICAL_CACHE_TTL_HOURS = _get("HISTORICAL_CACHE_TTL_HOURS", 1, int)
     
     # Service Feature Flags
-    ENHANCED_LOCATION_ENABLED = os.getenv("ENHANCED_LOCATION_ENABLED", "true").lower() == "true"
-    ENHANCED_TERMINAL_ENABLED = os.getenv("ENHANCED_TERMINAL_ENABLED", "true").lower() == "true"
-    ENHANCED_FINGERPRINT_ENABLED = os.getenv("ENHANCED_FINGERPRINT_ENABLED", "true").lower() == "true"
-    ENHANCED_HISTORICAL_ENABLED = os.getenv("ENHANCED_HISTORICAL_ENABLED", "true").lower() == "true"
+    ENHANCED_LOCATION_ENABLED = _get("ENHANCED_LOCATION_ENABLED", True, _as_bool)
+    ENHANCED_TERMINAL_ENABLED = _get("ENHANCED_TERMINAL_ENABLED", True, _as_bool)
+    ENHANCED_FINGERPRINT_ENABLED = _get("ENHANCED_FINGERPRINT_ENABLED", True, _as_bool)
+    ENHANCED_HISTORICAL_ENABLED = _get("ENHANCED_HISTORICAL_ENABLED", True, _as_bool)
     
     # Confidence Thresholds
-    MIN_LOCATION_CONFIDENCE = float(os.getenv("MIN_LOCATION_CONFIDENCE", "0.5"))
-    MIN_TERMINAL_CONFIDENCE = float(os.getenv("MIN_TERMINAL_CONFIDENCE", "0.6"))
-    MIN_FINGERPRINT_CONFIDENCE = float(os.getenv("MIN_FINGERPRINT_CONFIDENCE", "0.4"))
-    MIN_HISTORICAL_CONFIDENCE = float(os.getenv("MIN_HISTORICAL_CONFIDENCE", "0.5"))
+    MIN_LOCATION_CONFIDENCE = _get("MIN_LOCATION_CONFIDENCE", 0.5, float)
+    MIN_TERMINAL_CONFIDENCE = _get("MIN_TERMINAL_CONFIDENCE", 0.6, float)
+    MIN_FINGERPRINT_CONFIDENCE = _get("MIN_FINGERPRINT_CONFIDENCE", 0.4, float)
+    MIN_HISTORICAL_CONFIDENCE = _get("MIN_HISTORICAL_CONFIDENCE", 0.5, float)
     
     # Analysis Settings
-    DEFAULT_SEARCH_RADIUS_METERS = int(os.getenv("DEFAULT_SEARCH_RADIUS_METERS", "1"))
-    MAX_SEARCH_RADIUS_METERS = int(os.getenv("MAX_SEARCH_RADIUS_METERS", "10"))
-    MIN_SEARCH_RADIUS_METERS = int(os.getenv("MIN_SEARCH_RADIUS_METERS", "1"))
+    DEFAULT_SEARCH_RADIUS_METERS = _get("DEFAULT_SEARCH_RADIUS_METERS", 1, int)
+    MAX_SEARCH_RADIUS_METERS = _get("MAX_SEARCH_RADIUS_METERS", 10, int)
+    MIN_SEARCH_RADIUS_METERS = _get("MIN_SEARCH_RADIUS_METERS", 1, int)
     
     # Location Consistency Settings
-    LOCATION_CLUSTER_THRESHOLD_METERS = int(os.getenv("LOCATION_CLUSTER_THRESHOLD_METERS", "1"))
-    LOCATION_CACHE_DURATION_MINUTES = int(os.getenv("LOCATION_CACHE_DURATION_MINUTES", "30"))
-    ENABLE_REDUNDANT_API_CALLS = os.getenv("ENABLE_REDUNDANT_API_CALLS", "true").lower() == "true"
-    MAX_REDUNDANT_API_CALLS = int(os.getenv("MAX_REDUNDANT_API_CALLS", "4"))
+    LOCATION_CLUSTER_THRESHOLD_METERS = _get("LOCATION_CLUSTER_THRESHOLD_METERS", 1, int)
+    LOCATION_CACHE_DURATION_MINUTES = _get("LOCATION_CACHE_DURATION_MINUTES", 30, int)
+    ENABLE_REDUNDANT_API_CALLS = _get("ENABLE_REDUNDANT_API_CALLS", True, _as_bool)
+    MAX_REDUNDANT_API_CALLS = _get("MAX_REDUNDANT_API_CALLS", 4, int)
     
     # Database Settings
-    ENABLE_DATA_COLLECTION = os.getenv("ENABLE_DATA_COLLECTION", "true").lower() == "true"
-    ENABLE_LEARNING = os.getenv("ENABLE_LEARNING", "true").lower() == "true"
+    ENABLE_DATA_COLLECTION = _get("ENABLE_DATA_COLLECTION", True, _as_bool)
+    ENABLE_LEARNING = _get("ENABLE_LEARNING", True, _as_bool)
     
     # Performance Settings
-    MAX_CONCURRENT_API_CALLS = int(os.getenv("MAX_CONCURRENT_API_CALLS", "5"))
-    API_TIMEOUT_SECONDS = int(os.getenv("API_TIMEOUT_SECONDS", "10"))
+    MAX_CONCURRENT_API_CALLS = _get("MAX_CONCURRENT_API_CALLS", 5, int)
+    API_TIMEOUT_SECONDS = _get("API_TIMEOUT_SECONDS", 10, int)
     
     # Prediction Weights (must sum to ~1.0)
-    LOCATION_WEIGHT = float(os.getenv("LOCATION_WEIGHT", "0.35"))
-    HISTORICAL_WEIGHT = float(os.getenv("HISTORICAL_WEIGHT", "0.25"))
-    TERMINAL_WEIGHT = float(os.getenv("TERMINAL_WEIGHT", "0.20"))
-    WIFI_WEIGHT = float(os.getenv("WIFI_WEIGHT", "0.10"))
-    BLE_WEIGHT = float(os.getenv("BLE_WEIGHT", "0.10"))
+    LOCATION_WEIGHT = _get("LOCATION_WEIGHT", 0.35, float)
+    HISTORICAL_WEIGHT = _get("HISTORICAL_WEIGHT", 0.25, float)
+    TERMINAL_WEIGHT = _get("TERMINAL_WEIGHT", 0.20, float)
+    WIFI_WEIGHT = _get("WIFI_WEIGHT", 0.10, float)
+    BLE_WEIGHT = _get("BLE_WEIGHT", 0.10, float)
     
     @classmethod
     def get_google_places_config(cls) -> Dict[str, Any]:
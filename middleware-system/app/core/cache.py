@@ -0,0 +1,90 @@
+"""
+Shared Redis cache
+Lazily created async Redis client for caching results across workers
+"""
+
+import logging
+import time
+from typing import Any, Optional
+
+import orjson
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional - caching is skipped without redis
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds to stop using Redis after a connection error
+_REDIS_RETRY_SECONDS = 30.0
+
+_redis: Optional["aioredis.Redis"] = None
+_redis_retry_at: float = 0.0
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """Get the shared Redis client, or None if Redis is unavailable"""
+    global _redis
+    if aioredis is None or not settings.REDIS_URL:
+        return None
+    if time.monotonic() < _redis_retry_at:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=1.0,
+            socket_timeout=1.0
+        )
+    return _redis
+
+
+def _report_redis_error(e: Exception):
+    """Back off from Redis for a while after an error"""
+    global _redis_retry_at
+    _redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+    logger.warning(f"Redis unavailable, caching disabled for {_REDIS_RETRY_SECONDS:.0f}s: {e}")
+
+
+async def cache_get_json(key: str) -> Optional[Any]:
+    """Get a JSON value from Redis, or None on miss or error"""
+    redis = get_redis()
+    if redis is None:
+        return None
+
+    try:
+        payload = await redis.get(key)
+        return orjson.loads(payload) if payload is not None else None
+    except Exception as e:
+        _report_redis_error(e)
+        return None
+
+
+async def cache_set_json(key: str, value: Any, ttl_seconds: int) -> bool:
+    """Store a JSON-serializable value in Redis with a TTL"""
+    redis = get_redis()
+    if redis is None:
+        return False
+
+    try:
+        payload = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    except TypeError as e:
+        logger.warning(f"Value for {key} is not JSON-serializable, skipping cache: {e}")
+        return False
+
+    try:
+        await redis.set(key, payload, ex=ttl_seconds)
+        return True
+    except Exception as e:
+        _report_redis_error(e)
+        return False
+
+
+async def close_redis():
+    """Close the shared Redis connection pool"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,20 @@
+"""
+Coarse wall clock
+Response timestamps at one-second resolution, formatted at most once per second
+"""
+
+import time
+from datetime import datetime
+from typing import Tuple
+
+# Last formatted second as (epoch second, iso_string)
+_last_second: Tuple[int, str] = (0, "")
+
+
+def now_iso() -> str:
+    """Current local time in ISO format, truncated to the second"""
+    global _last_second
+    second = int(time.time())
+    if second != _last_second[0]:
+        _last_second = (second, datetime.fromtimestamp(second).isoformat())
+    return _last_second[1]
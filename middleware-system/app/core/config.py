@@ -12,6 +12,29 @@ from dotenv import load_dotenv
 # Load environment variables before creating settings
 load_dotenv()
 
+# One snapshot of the environment, taken after .env is loaded
+_ENV = dict(os.environ)
+
+
+def _as_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _get(key: str, default=None, cast=str):
+    """Read a value from the environment snapshot, casting it if set"""
+    value = _ENV.get(key)
+    return default if value is None else cast(value)
+
+
+# Read once and shared by the canonical and legacy settings below
+_HOST = _get("PAYVO_HOST", "0.0.0.0")
+_PORT = _get("PAYVO_PORT", 8000, int)
+_DEBUG = _get("PAYVO_DEBUG", False, _as_bool)
+_SECRET_KEY = _get("PAYVO_SECRET_KEY", "your-secret-key-change-in-production")
+_RATE_LIMIT_PER_MINUTE = _get("PAYVO_RATE_LIMIT_PER_MINUTE", 100, int)
+_LOG_LEVEL = _get("PAYVO_LOG_LEVEL", "INFO")
+_GOOGLE_API_KEY = _get("GOOGLE_API_KEY")
+
 class Settings(BaseSettings):
     model_config = ConfigDict(
         case_sensitive=True,
@@ -25,18 +48,22 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     
     # Server Configuration
-    PAYVO_HOST: str = os.getenv("PAYVO_HOST", "0.0.0.0")
-    PAYVO_PORT: int = int(os.getenv("PAYVO_PORT", "8000"))
-    PAYVO_DEBUG: bool = os.getenv("PAYVO_DEBUG", "false").lower() == "true"
+    PAYVO_HOST: str = _HOST
+    PAYVO_PORT: int = _PORT
+    PAYVO_DEBUG: bool = _DEBUG
     
     # Legacy support for old config names
-    HOST: str = os.getenv("PAYVO_HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PAYVO_PORT", "8000"))
-    DEBUG: bool = os.getenv("PAYVO_DEBUG", "false").lower() == "true"
+    HOST: str = _HOST
+    PORT: int = _PORT
+    DEBUG: bool = _DEBUG
+    
+    # Uvicorn worker processes (WEB_CONCURRENCY is the Railway/Heroku convention).
+    # Routing sessions are held in process memory, so default to a single worker.
+    WORKERS: int = _get("PAYVO_WORKERS", _get("WEB_CONCURRENCY", 1, int), int)
     
     # Security
-    PAYVO_SECRET_KEY: str = os.getenv("PAYVO_SECRET_KEY", "your-secret-key-change-in-production")
-    SECRET_KEY: str = os.getenv("SECRET_KEY", os.getenv("PAYVO_SECRET_KEY", "your-secret-key-change-in-production"))
+    PAYVO_SECRET_KEY: str = _SECRET_KEY
+    SECRET_KEY: str = _get("SECRET_KEY", _SECRET_KEY)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
     
     # CORS Configuration
@@ -49,16 +76,16 @@ class Settings(BaseSettings):
     ]
     
     # Rate Limiting
-    PAYVO_RATE_LIMIT_PER_MINUTE: int = int(os.getenv("PAYVO_RATE_LIMIT_PER_MINUTE", "100"))
-    RATE_LIMIT_PER_MINUTE: int = int(os.getenv("PAYVO_RATE_LIMIT_PER_MINUTE", "100"))
+    PAYVO_RATE_LIMIT_PER_MINUTE: int = _RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_PER_MINUTE: int = _RATE_LIMIT_PER_MINUTE
     
     # Supabase Configuration (Primary Database)
-    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
-    SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY", "")
-    SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    SUPABASE_URL: str = _get("SUPABASE_URL", "")
+    SUPABASE_ANON_KEY: str = _get("SUPABASE_ANON_KEY", "")
+    SUPABASE_SERVICE_ROLE_KEY: str = _get("SUPABASE_SERVICE_ROLE_KEY", "")
     
     # Redis (Optional - for caching)
-    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_URL: str = _get("REDIS_URL", "redis://localhost:6379")
     
     # MCC Detection Configuration
     MCC_CONFIDENCE_THRESHOLD: float = 0.7
@@ -76,14 +103,14 @@ class Settings(BaseSettings):
     SUPPORTED_NETWORKS: List[str] = ["visa", "mastercard", "amex", "discover"]
     
     # Logging
-    PAYVO_LOG_LEVEL: str = os.getenv("PAYVO_LOG_LEVEL", "INFO")
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", os.getenv("PAYVO_LOG_LEVEL", "INFO"))
+    PAYVO_LOG_LEVEL: str = _LOG_LEVEL
+    LOG_LEVEL: str = _get("LOG_LEVEL", _LOG_LEVEL)
     
     # External APIs (Optional)
-    GOOGLE_API_KEY: Optional[str] = os.getenv("GOOGLE_API_KEY")
-    GOOGLE_PLACES_API_KEY: Optional[str] = os.getenv("GOOGLE_PLACES_API_KEY", os.getenv("GOOGLE_API_KEY"))
-    FOURSQUARE_API_KEY: Optional[str] = os.getenv("FOURSQUARE_API_KEY")
-    STRIPE_API_KEY: Optional[str] = os.getenv("STRIPE_API_KEY")
+    GOOGLE_API_KEY: Optional[str] = _GOOGLE_API_KEY
+    GOOGLE_PLACES_API_KEY: Optional[str] = _get("GOOGLE_PLACES_API_KEY", _GOOGLE_API_KEY)
+    FOURSQUARE_API_KEY: Optional[str] = _get("FOURSQUARE_API_KEY")
+    STRIPE_API_KEY: Optional[str] = _get("STRIPE_API_KEY")
     
     # Location Service Configuration
     GOOGLE_PLACES_ENABLED: bool = True
@@ -110,24 +137,24 @@ class Settings(BaseSettings):
     
     @validator('OPENAI_API_KEY', pre=True, allow_reuse=True)
     def validate_openai_key(cls, v):
-        return os.getenv("OPENAI_API_KEY", v or "")
+        return _get("OPENAI_API_KEY", v or "")
     
     @validator('OPENAI_MODEL', pre=True, allow_reuse=True)
     def validate_openai_model(cls, v):
-        return os.getenv("OPENAI_MODEL", v or "gpt-4o-mini")
+        return _get("OPENAI_MODEL", v or "gpt-4o-mini")
     
     @validator('OPENAI_MAX_TOKENS', pre=True, allow_reuse=True)
     def validate_openai_tokens(cls, v):
-        return int(os.getenv("OPENAI_MAX_TOKENS", v or 1000))
+        return int(_get("OPENAI_MAX_TOKENS", v or 1000))
     
     @validator('OPENAI_TEMPERATURE', pre=True, allow_reuse=True)
     def validate_openai_temperature(cls, v):
-        return float(os.getenv("OPENAI_TEMPERATURE", v or 0.3))
+        return float(_get("OPENAI_TEMPERATURE", v or 0.3))
     
     @property
     def ALLOWED_HOSTS(self) -> List[str]:
         """Parse ALLOWED_HOSTS from environment variable"""
-        allowed_hosts_str = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1,10.0.0.207")
+        allowed_hosts_str = _get("ALLOWED_HOSTS", "localhost,127.0.0.1,10.0.0.207")
         if isinstance(allowed_hosts_str, str):
             return [host.strip().strip('"').strip("'") for host in allowed_hosts_str.split(",")]
         return ["localhost", "127.0.0.1", "10.0.0.207"]
@@ -0,0 +1,40 @@
+"""
+Shared HTTP client
+Lazily created httpx client so every outbound API call reuses one HTTP/2 connection pool
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Default per-request timeout for outbound API calls, in seconds
+_HTTP_TIMEOUT_SECONDS = 5.0
+
+_http: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared keep-alive HTTP/2 client"""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(_HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+    return _http
+
+
+async def close_http_client():
+    """Close the shared HTTP connection pool"""
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    
+    # Cached OpenAI clients wrap the pool just closed, so build fresh ones next time
+    from app.services.llm_service import get_openai_client
+    get_openai_client.cache_clear()
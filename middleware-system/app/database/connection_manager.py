@@ -83,6 +83,22 @@ class DatabaseConnectionManager:
         
         return await supabase_client.get_location_mcc_history(location_hash, limit)
     
+    async def get_terminal_mcc_distribution(self, terminal_id: str, lookback: int = 50) -> List[Dict[str, Any]]:
+        """Get terminal MCC counts using Supabase"""
+        if not self.is_available:
+            logger.error("No database connection available for retrieving terminal distribution")
+            return []
+        
+        return await supabase_client.get_terminal_mcc_distribution(terminal_id, lookback)
+    
+    async def get_location_mcc_distribution(self, location_hash: str, lookback: int = 20) -> List[Dict[str, Any]]:
+        """Get location MCC counts using Supabase"""
+        if not self.is_available:
+            logger.error("No database connection available for retrieving location distribution")
+            return []
+        
+        return await supabase_client.get_location_mcc_distribution(location_hash, lookback)
+    
     async def store_card_performance(self, performance_data: Dict[str, Any]) -> bool:
         """Store card performance data using Supabase"""
         if not self.is_available:
@@ -97,7 +113,7 @@ class DatabaseConnectionManager:
             logger.error("No database connection available for retrieving card performance")
             return None
         
-        return await supabase_client.get_card_performance_stats(card_id, days)
+        return await supabase_client.get_card_performance_stats(card_id)
     
     async def get_user_preferences(self, user_id: str) -> Dict[str, Any]:
         """Get user preferences using Supabase"""
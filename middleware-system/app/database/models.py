@@ -9,6 +9,9 @@ from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field, validator
 from uuid import UUID, uuid4
 
+# All ASCII 4-digit MCC strings ("0000"-"9999") for single-lookup validation
+_VALID_MCC = frozenset(f"{i:04d}" for i in range(10000))
+
 
 class TransactionFeedback(BaseModel):
     """Model for transaction feedback data"""
@@ -34,7 +37,7 @@ class TransactionFeedback(BaseModel):
 
     @validator('predicted_mcc', 'actual_mcc')
     def validate_mcc(cls, v):
-        if v is not None and (len(v) != 4 or not v.isdigit()):
+        if v is not None and v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -59,7 +62,7 @@ class MCCPrediction(BaseModel):
 
     @validator('predicted_mcc')
     def validate_mcc(cls, v):
-        if len(v) != 4 or not v.isdigit():
+        if v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -81,7 +84,7 @@ class CardPerformance(BaseModel):
 
     @validator('mcc')
     def validate_mcc(cls, v):
-        if v is not None and (len(v) != 4 or not v.isdigit()):
+        if v is not None and v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -114,7 +117,7 @@ class TerminalCache(BaseModel):
 
     @validator('mcc')
     def validate_mcc(cls, v):
-        if len(v) != 4 or not v.isdigit():
+        if v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -136,7 +139,7 @@ class LocationCache(BaseModel):
 
     @validator('mcc')
     def validate_mcc(cls, v):
-        if len(v) != 4 or not v.isdigit():
+        if v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -157,7 +160,7 @@ class WiFiCache(BaseModel):
 
     @validator('mcc')
     def validate_mcc(cls, v):
-        if len(v) != 4 or not v.isdigit():
+        if v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -178,7 +181,7 @@ class BLECache(BaseModel):
 
     @validator('mcc')
     def validate_mcc(cls, v):
-        if len(v) != 4 or not v.isdigit():
+        if v not in _VALID_MCC:
             raise ValueError('MCC must be a 4-digit string')
         return v
 
@@ -4,16 +4,53 @@ Handles all database operations using Supabase
 """
 
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import asyncio
+import functools
 import hashlib
+import math
+import time
 
+import httpx
+import numpy as np
+
+from postgrest import AsyncPostgrestClient
 from supabase import create_client, Client
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Seconds an MCC distribution for a terminal/location is served from memory
+_DISTRIBUTION_TTL_SECONDS = 60.0
+_DISTRIBUTION_CACHE_MAX_ENTRIES = 10_000
+
+# Last generated write timestamp as (monotonic_ns, iso_string)
+_last_ts: Tuple[int, str] = (0, "")
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time in ISO format, reused for writes within the same millisecond"""
+    global _last_ts
+    now_ns = time.monotonic_ns()
+    if not _last_ts[1] or now_ns - _last_ts[0] > 1_000_000:
+        _last_ts = (now_ns, datetime.now(timezone.utc).isoformat())
+    return _last_ts[1]
+
+
+async def run_query(query):
+    """Run a synchronous supabase-py query in a worker thread, off the event loop"""
+    return await asyncio.to_thread(query.execute)
+
+
+def _coalesce_reads(method):
+    """Serve concurrent identical calls of a read method from one in-flight query"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return await self._singleflight(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
 
 class SupabaseClient:
     """
@@ -22,6 +59,11 @@ class SupabaseClient:
     
     def __init__(self):
         self.client: Optional[Client] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._async_client: Optional[AsyncPostgrestClient] = None
+        self._distribution_cache: Dict[Tuple[str, str, int], Tuple[float, List[Dict]]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.is_available: bool = False
         self._initialize_client()
     
     def _initialize_client(self):
@@ -32,17 +74,45 @@ class SupabaseClient:
                     settings.SUPABASE_URL,
                     settings.SUPABASE_ANON_KEY
                 )
+                # Async PostgREST client on a shared HTTP/2 pool for this class's own queries
+                self._http = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                    timeout=10.0
+                )
+                self._async_client = AsyncPostgrestClient(
+                    f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1",
+                    headers={
+                        "apikey": settings.SUPABASE_ANON_KEY,
+                        "Authorization": f"Bearer {settings.SUPABASE_ANON_KEY}"
+                    },
+                    http_client=self._http
+                )
+                self.is_available = True
                 logger.info("Supabase client initialized successfully")
             else:
                 logger.warning("Supabase not configured - using fallback storage")
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {e}")
             self.client = None
+            self._async_client = None
+            self.is_available = False
     
-    @property
-    def is_available(self) -> bool:
-        """Check if Supabase client is available and configured"""
-        return self.client is not None
+    async def close(self):
+        """Close the shared async HTTP connection pool"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _singleflight(self, key: Tuple, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for key, starting it if none is running"""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(coro_fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the query for the others
+        return await asyncio.shield(fut)
     
     async def get_user_id_by_email(self, email: str) -> str:
         """Get user UUID by email using the get_user_by_email database function"""
@@ -51,7 +121,7 @@ class SupabaseClient:
         
         try:
             # Call our custom database function
-            result = self.client.rpc('get_user_by_email', {'email_param': email}).execute()
+            result = await self._async_client.rpc('get_user_by_email', {'email_param': email}).execute()
             
             if result.data and len(result.data) > 0:
                 user_data = result.data[0]
@@ -107,6 +177,7 @@ class SupabaseClient:
                         logger.info(f"🎯 Generated location hash: {location_hash}")
             
             # Prepare data for Supabase with proper field mapping
+            now_iso = _utc_now_iso()
             data = {
                 "session_id": feedback_data.get("session_id"),
                 "user_id": resolved_user_id,  # Use resolved UUID or None if not found
@@ -131,8 +202,8 @@ class SupabaseClient:
                 "ble_fingerprint": feedback_data.get("ble_fingerprint"),
                 "context_features": feedback_data.get("additional_data", {}),
                 "transaction_timestamp": feedback_data.get("timestamp"),
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
+                "created_at": now_iso,
+                "updated_at": now_iso
             }
             
             # Always store email in context_features for backup user identification
@@ -157,7 +228,7 @@ class SupabaseClient:
             
             logger.info(f"💾 Final data to insert: {filtered_data}")
             
-            result = self.client.table("transaction_feedback").insert(filtered_data).execute()
+            result = await self._async_client.from_("transaction_feedback").insert(filtered_data).execute()
             
             if result.data:
                 logger.info(f"✅ Transaction feedback stored successfully for session {feedback_data.get('session_id')}")
@@ -191,7 +262,7 @@ class SupabaseClient:
                     logger.warning(f"⚠️ Could not resolve email to user ID, returning empty transaction history: {user_id}")
                     return []
             
-            result = self.client.table("transaction_feedback")\
+            result = await self._async_client.from_("transaction_feedback")\
                 .select("*")\
                 .eq("user_id", resolved_user_id)\
                 .order("created_at", desc=True)\
@@ -222,28 +293,29 @@ class SupabaseClient:
                 "confidence": prediction_data.get("confidence"),
                 "method_used": prediction_data.get("method_used"),
                 "context_features": prediction_data.get("context_features"),
-                "created_at": datetime.utcnow().isoformat()
+                "created_at": _utc_now_iso()
             }
             
-            result = self.client.table("mcc_predictions").insert(data).execute()
+            result = await self._async_client.from_("mcc_predictions").insert(data).execute()
             return bool(result.data)
             
         except Exception as e:
             logger.error(f"Error storing MCC prediction: {e}")
             return False
     
-    async def get_terminal_mcc_history(self, terminal_id: str) -> List[Dict]:
+    @_coalesce_reads
+    async def get_terminal_mcc_history(self, terminal_id: str, limit: int = 50) -> List[Dict]:
         """Get MCC history for a specific terminal"""
         if not self.is_available:
             return []
         
         try:
-            result = self.client.table("transaction_feedback")\
+            result = await self._async_client.from_("transaction_feedback")\
                 .select("actual_mcc, created_at")\
                 .eq("terminal_id", terminal_id)\
                 .not_.is_("actual_mcc", "null")\
                 .order("created_at", desc=True)\
-                .limit(50)\
+                .limit(limit)\
                 .execute()
             
             return result.data if result.data else []
@@ -252,18 +324,19 @@ class SupabaseClient:
             logger.error(f"Error fetching terminal MCC history: {e}")
             return []
     
-    async def get_location_mcc_history(self, location_hash: str) -> List[Dict]:
+    @_coalesce_reads
+    async def get_location_mcc_history(self, location_hash: str, limit: int = 20) -> List[Dict]:
         """Get MCC history for a specific location"""
         if not self.is_available:
             return []
         
         try:
-            result = self.client.table("transaction_feedback")\
+            result = await self._async_client.from_("transaction_feedback")\
                 .select("actual_mcc, created_at, merchant_name")\
                 .eq("location_hash", location_hash)\
                 .not_.is_("actual_mcc", "null")\
                 .order("created_at", desc=True)\
-                .limit(20)\
+                .limit(limit)\
                 .execute()
             
             return result.data if result.data else []
@@ -272,6 +345,55 @@ class SupabaseClient:
             logger.error(f"Error fetching location MCC history: {e}")
             return []
     
+    async def _call_rpc(self, function_name: str, params: Dict[str, Any]) -> List[Dict]:
+        """Call a database function and return its rows"""
+        result = await self._async_client.rpc(function_name, params).execute()
+        return result.data if result.data else []
+    
+    async def _get_mcc_distribution(self, function_name: str, params: Dict[str, Any]) -> List[Dict]:
+        """Call an MCC distribution RPC, serving recent results from a short TTL cache"""
+        key = (function_name, *params.values())
+        cached = self._distribution_cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[0] < _DISTRIBUTION_TTL_SECONDS:
+            return cached[1]
+        
+        rows = await self._singleflight(key, lambda: self._call_rpc(function_name, params))
+        if len(self._distribution_cache) >= _DISTRIBUTION_CACHE_MAX_ENTRIES:
+            self._distribution_cache.clear()
+        self._distribution_cache[key] = (now, rows)
+        return rows
+    
+    async def get_terminal_mcc_distribution(self, terminal_id: str, lookback: int = 50) -> List[Dict]:
+        """Get (mcc, cnt, latest) counts over a terminal's recent transactions"""
+        if not self.is_available:
+            return []
+        
+        try:
+            return await self._get_mcc_distribution(
+                "terminal_mcc_distribution",
+                {"p_terminal_id": terminal_id, "p_lookback": lookback}
+            )
+            
+        except Exception as e:
+            logger.error(f"Error fetching terminal MCC distribution: {e}")
+            return []
+    
+    async def get_location_mcc_distribution(self, location_hash: str, lookback: int = 20) -> List[Dict]:
+        """Get (mcc, cnt, latest) counts over a location's recent transactions"""
+        if not self.is_available:
+            return []
+        
+        try:
+            return await self._get_mcc_distribution(
+                "location_mcc_distribution",
+                {"p_location_hash": location_hash, "p_lookback": lookback}
+            )
+            
+        except Exception as e:
+            logger.error(f"Error fetching location MCC distribution: {e}")
+            return []
+    
     # Card Performance Operations
     
     async def store_card_performance(self, performance_data: Dict[str, Any]) -> bool:
@@ -288,45 +410,52 @@ class SupabaseClient:
                 "transaction_success": performance_data.get("transaction_success"),
                 "rewards_earned": performance_data.get("rewards_earned"),
                 "transaction_amount": performance_data.get("transaction_amount"),
-                "created_at": datetime.utcnow().isoformat()
+                "created_at": _utc_now_iso()
             }
             
-            result = self.client.table("card_performance").insert(data).execute()
+            result = await self._async_client.from_("card_performance").insert(data).execute()
             return bool(result.data)
             
         except Exception as e:
             logger.error(f"Error storing card performance: {e}")
             return False
     
+    @_coalesce_reads
     async def get_card_performance_stats(self, card_id: str, mcc: str = None) -> Dict[str, Any]:
         """Get performance statistics for a card"""
         if not self.is_available:
             return {}
         
         try:
-            query = self.client.table("card_performance")\
-                .select("*")\
+            query = self._async_client.from_("card_performance")\
+                .select("transaction_success, rewards_earned")\
                 .eq("card_id", card_id)
             
             if mcc:
                 query = query.eq("mcc", mcc)
             
-            result = query.execute()
+            result = await query.execute()
             
             if not result.data:
                 return {}
             
-            # Calculate statistics
+            # Integer success counter and a compensated rewards sum; rates derived once at the end
             transactions = result.data
             total_transactions = len(transactions)
-            successful_transactions = sum(1 for t in transactions if t.get("transaction_success"))
-            total_rewards = sum(t.get("rewards_earned", 0) for t in transactions)
+            successful_transactions = int(np.count_nonzero(np.fromiter(
+                (bool(t.get("transaction_success")) for t in transactions),
+                dtype=np.bool_,
+                count=total_transactions
+            )))
+            total_rewards = math.fsum(
+                float(t.get("rewards_earned") or 0.0) for t in transactions
+            )
             
             return {
                 "total_transactions": total_transactions,
-                "success_rate": successful_transactions / total_transactions if total_transactions > 0 else 0,
+                "success_rate": successful_transactions / total_transactions,
                 "total_rewards": total_rewards,
-                "average_rewards": total_rewards / total_transactions if total_transactions > 0 else 0
+                "average_rewards": total_rewards / total_transactions
             }
             
         except Exception as e:
@@ -335,13 +464,14 @@ class SupabaseClient:
     
     # User Profile Operations
     
+    @_coalesce_reads
     async def get_user_preferences(self, user_id: str) -> Dict[str, Any]:
         """Get user's card and routing preferences"""
         if not self.is_available:
             return {}
         
         try:
-            result = self.client.table("user_preferences")\
+            result = await self._async_client.from_("user_preferences")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .execute()
@@ -364,11 +494,11 @@ class SupabaseClient:
             data = {
                 "user_id": user_id,
                 "preferences": preferences,
-                "updated_at": datetime.utcnow().isoformat()
+                "updated_at": _utc_now_iso()
             }
             
             # Try to update first, then insert if not exists
-            result = self.client.table("user_preferences")\
+            result = await self._async_client.from_("user_preferences")\
                 .upsert(data)\
                 .execute()
             
@@ -380,18 +510,19 @@ class SupabaseClient:
     
     # Analytics Operations
     
+    @_coalesce_reads
     async def get_system_analytics(self, days: int = 30) -> Dict[str, Any]:
         """Get system-wide analytics"""
         if not self.is_available:
             return {}
         
         try:
-            cutoff_date = (datetime.utcnow().timestamp() - (days * 24 * 60 * 60)) * 1000
+            cutoff_iso = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
             
             # Get prediction accuracy
-            result = self.client.table("transaction_feedback")\
+            result = await self._async_client.from_("transaction_feedback")\
                 .select("predicted_mcc, actual_mcc, prediction_confidence")\
-                .gte("created_at", datetime.fromtimestamp(cutoff_date/1000).isoformat())\
+                .gte("created_at", cutoff_iso)\
                 .not_.is_("actual_mcc", "null")\
                 .execute()
             
@@ -399,18 +530,21 @@ class SupabaseClient:
                 return {}
             
             transactions = result.data
-            correct_predictions = sum(
-                1 for t in transactions 
-                if t.get("predicted_mcc") == t.get("actual_mcc")
-            )
-            
             total_predictions = len(transactions)
-            avg_confidence = sum(t.get("prediction_confidence", 0) for t in transactions) / total_predictions
+            
+            # Column-wise comparison and mean instead of per-row Python loops
+            predicted = np.array([t.get("predicted_mcc") or "" for t in transactions], dtype="U4")
+            actual = np.array([t.get("actual_mcc") or "" for t in transactions], dtype="U4")
+            confidence = np.fromiter(
+                (t.get("prediction_confidence") or 0.0 for t in transactions),
+                dtype=np.float64,
+                count=total_predictions
+            )
             
             return {
                 "total_predictions": total_predictions,
-                "accuracy_rate": correct_predictions / total_predictions if total_predictions > 0 else 0,
-                "average_confidence": avg_confidence,
+                "accuracy_rate": float((predicted == actual).mean()),
+                "average_confidence": float(confidence.mean()),
                 "period_days": days
             }
             
@@ -419,50 +553,10 @@ class SupabaseClient:
             return {}
 
 
-# Global instance - lazy loaded
-_supabase_client = None
+# Global instance - callers bind this directly
+supabase_client: SupabaseClient = SupabaseClient()
 
-def get_supabase_client() -> SupabaseClient:
-    """Get the global Supabase client instance (lazy loaded)"""
-    global _supabase_client
-    if _supabase_client is None:
-        _supabase_client = SupabaseClient()
-    return _supabase_client
 
-# Create a property-like object for backward compatibility
-class SupabaseClientProxy:
-    @property
-    def is_available(self) -> bool:
-        return get_supabase_client().is_available
-    
-    async def store_transaction_feedback(self, feedback_data):
-        return await get_supabase_client().store_transaction_feedback(feedback_data)
-    
-    async def get_user_transaction_history(self, user_id: str, limit: int = 100):
-        return await get_supabase_client().get_user_transaction_history(user_id, limit)
-    
-    async def store_mcc_prediction_result(self, prediction_data):
-        return await get_supabase_client().store_mcc_prediction_result(prediction_data)
-    
-    async def get_terminal_mcc_history(self, terminal_id: str, limit: int = 50):
-        return await get_supabase_client().get_terminal_mcc_history(terminal_id)
-    
-    async def get_location_mcc_history(self, location_hash: str, limit: int = 50):
-        return await get_supabase_client().get_location_mcc_history(location_hash)
-    
-    async def store_card_performance(self, performance_data):
-        return await get_supabase_client().store_card_performance(performance_data)
-    
-    async def get_card_performance_stats(self, card_id: str, days: int = 30):
-        return await get_supabase_client().get_card_performance_stats(card_id)
-    
-    async def get_user_preferences(self, user_id: str):
-        return await get_supabase_client().get_user_preferences(user_id)
-    
-    async def update_user_preferences(self, user_id: str, preferences):
-        return await get_supabase_client().update_user_preferences(user_id, preferences)
-    
-    async def get_system_analytics(self, days: int = 7):
-        return await get_supabase_client().get_system_analytics(days)
-
-supabase_client = SupabaseClientProxy() 
\ No newline at end of file
+def get_supabase_client() -> SupabaseClient:
+    """Get the global Supabase client instance"""
+    return supabase_client
@@ -7,11 +7,13 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
 from app.api.routes import router as routes_router
 from app.api.route_modules.mcc_prediction import router as mcc_router
 from app.middleware.auth_middleware import AuthenticationMiddleware
 from app.core.config import settings
+from app.core.clock import now_iso
 
 logger = logging.getLogger(__name__)
 
@@ -45,10 +47,22 @@ async def lifespan(app: FastAPI):
             
             return True
         
+        async def init_mcc_services():
+            from app.api.route_modules.mcc_prediction import orchestrator as mcc_orchestrator
+            
+            # Warm MCC prediction services before traffic so the first request doesn't pay for it
+            logger.info("🔧 Initializing MCC prediction services...")
+            await mcc_orchestrator.initialize_services()
+            logger.info("✅ MCC prediction services initialized")
+            return True
+        
         # Run initialization with timeout
         try:
-            success = await asyncio.wait_for(init_with_timeout(), timeout=20.0)  # Reduced timeout
-            if success:
+            results = await asyncio.wait_for(
+                asyncio.gather(init_with_timeout(), init_mcc_services()),
+                timeout=20.0  # Reduced timeout
+            )
+            if all(results):
                 logger.info("✅ All services initialized successfully")
         except asyncio.TimeoutError:
             logger.warning("⚠️ Service initialization timed out - continuing with degraded services")
@@ -82,6 +96,14 @@ async def lifespan(app: FastAPI):
             await routing_orchestrator.cleanup()
             logger.info("✅ Routing orchestrator cleanup completed")
             
+            # Release pooled Supabase, Redis and outbound HTTP connections
+            from app.database.supabase_client import supabase_client
+            from app.core.cache import close_redis
+            from app.core.http_client import close_http_client
+            await supabase_client.close()
+            await close_redis()
+            await close_http_client()
+            
             return True
         
         # Run shutdown with timeout
@@ -105,6 +127,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,  # orjson encoding for every route
     lifespan=lifespan
 )
 
@@ -138,7 +161,6 @@ async def railway_health():
     Railway-specific health check endpoint
     This bypasses all service dependencies to ensure Railway deployment succeeds
     """
-    from datetime import datetime
     
     try:
         # Try to get health status from routing orchestrator if available
@@ -159,7 +181,7 @@ async def railway_health():
             "data": {
                 "status": "healthy",
                 "version": "2.0.0",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
                 "components": {
                     "routing_orchestrator": "initializing",
                     "database": "unknown",
@@ -183,7 +205,7 @@ async def railway_health():
                 "railway_deployment": True
             },
             "message": "System is healthy and ready for requests",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
         
     except Exception as e:
@@ -194,7 +216,7 @@ async def railway_health():
             "data": {
                 "status": "degraded",
                 "version": "2.0.0",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
                 "components": {
                     "routing_orchestrator": "failed",
                     "database": "unknown",
@@ -205,7 +227,7 @@ async def railway_health():
             },
             "error": str(e),
             "message": "System has issues but is attempting to serve requests",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
 # Include API routers
@@ -227,16 +249,20 @@ async def simple_health():
     """Simple health check endpoint for basic monitoring"""
     return {"status": "healthy", "service": "payvo-middleware"}
 
+@app.get("/livez", response_class=PlainTextResponse, include_in_schema=False)
+async def livez():
+    """Liveness probe - no dependencies, no JSON"""
+    return "ok"
+
 @app.get("/ping")
 async def ping():
     """Simple ping endpoint for connection testing"""
-    from datetime import datetime
     return {
         "message": "pong",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "service": "payvo-middleware"
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
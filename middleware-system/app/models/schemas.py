@@ -65,8 +65,8 @@ class PreTapContext(BaseModel):
     user_id: str
     session_id: str
     location: Optional[LocationData] = None
-    wifi_networks: List[WiFiData] = []
-    ble_devices: List[BLEData] = []
+    wifi_networks: List[WiFiData] = Field(default_factory=list)
+    ble_devices: List[BLEData] = Field(default_factory=list)
     terminal_data: Optional[TerminalData] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
@@ -76,7 +76,7 @@ class MCCPrediction(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     method: MCCDetectionMethod
     confidence_level: ConfidenceLevel
-    metadata: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = Field(default_factory=dict)
     
     @validator('confidence_level', pre=True, always=True)
     def set_confidence_level(cls, v, values):
@@ -132,6 +132,16 @@ class RoutingDecision(BaseModel):
     fallback_used: bool = False
 
 
+class PaymentActivationRequest(BaseModel):
+    location: Optional[Dict[str, Any]] = Field(default=None, description="Real-time GPS location data")
+    terminal_id: Optional[str] = Field(default=None, description="Terminal ID if available")
+    merchant_name: Optional[str] = Field(default=None, description="Merchant name if known")
+    wifi_networks: Optional[List[Dict[str, Any]]] = Field(default=None, description="WiFi networks detected")
+    ble_beacons: Optional[List[Dict[str, Any]]] = Field(default=None, description="BLE beacons detected")
+    amount: Optional[float] = Field(default=None, description="Transaction amount")
+    context_info: Optional[Dict[str, Any]] = Field(default=None, description="Additional context information")
+
+
 class TransactionFeedback(BaseModel):
     session_id: str
     user_id: Optional[str] = None
@@ -165,7 +175,7 @@ class HealthCheck(BaseModel):
     status: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     version: str
-    components: Dict[str, str] = {}
+    components: Dict[str, str] = Field(default_factory=dict)
 
 
 class APIResponse(BaseModel):
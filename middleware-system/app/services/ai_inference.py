@@ -6,10 +6,10 @@ import asyncio
 import logging
 import json
 from typing import Optional, Dict, Any
-from openai import AsyncOpenAI
 import openai
 
 from app.core.config import settings
+from app.services.llm_service import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +24,7 @@ class AIInferenceService:
         
         # Initialize OpenAI client if API key is available
         if settings.OPENAI_API_KEY:
-            self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = get_openai_client(settings.OPENAI_API_KEY)
             logger.info("OpenAI client initialized successfully")
         else:
             logger.warning("OpenAI API key not found - LLM features will use fallback")
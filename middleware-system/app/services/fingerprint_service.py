@@ -20,7 +20,7 @@ from sklearn.preprocessing import StandardScaler
 from geopy.distance import geodesic
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..database.supabase_client import get_supabase_client, run_query
 from .pos_terminal_service import pos_terminal_service
 
 logger = logging.getLogger(__name__)
@@ -44,10 +44,9 @@ class FingerprintService:
             
             # Test database connectivity if available
             if self.supabase.is_available:
-                # Supabase operations are synchronous, no await needed
-                self.supabase.client.table('wifi_fingerprints').select('*').limit(1).execute()
-                self.supabase.client.table('ble_fingerprints').select('*').limit(1).execute()
-                self.supabase.client.table('venue_fingerprints').select('*').limit(1).execute()
+                await run_query(self.supabase.client.table('wifi_fingerprints').select('*').limit(1))
+                await run_query(self.supabase.client.table('ble_fingerprints').select('*').limit(1))
+                await run_query(self.supabase.client.table('venue_fingerprints').select('*').limit(1))
                 logger.info("Fingerprint service database connectivity verified")
             else:
                 logger.warning("Fingerprint service: Supabase not available, using fallback")
@@ -61,9 +60,9 @@ class FingerprintService:
         try:
             if self.supabase and self.supabase.is_available:
                 # Test all fingerprint tables
-                self.supabase.client.table('wifi_fingerprints').select('*').limit(1).execute()
-                self.supabase.client.table('ble_fingerprints').select('*').limit(1).execute()
-                self.supabase.client.table('venue_fingerprints').select('*').limit(1).execute()
+                await run_query(self.supabase.client.table('wifi_fingerprints').select('*').limit(1))
+                await run_query(self.supabase.client.table('ble_fingerprints').select('*').limit(1))
+                await run_query(self.supabase.client.table('venue_fingerprints').select('*').limit(1))
                 logger.info("Fingerprint service database validation successful")
                 return True
         except Exception as e:
@@ -74,9 +73,9 @@ class FingerprintService:
         """Create database tables for fingerprinting data"""
         try:
             # Check if tables exist
-            self.supabase.client.table('wifi_fingerprints').select('*').limit(1).execute()
-            self.supabase.client.table('ble_fingerprints').select('*').limit(1).execute()
-            self.supabase.client.table('venue_fingerprints').select('*').limit(1).execute()
+            await run_query(self.supabase.client.table('wifi_fingerprints').select('*').limit(1))
+            await run_query(self.supabase.client.table('ble_fingerprints').select('*').limit(1))
+            await run_query(self.supabase.client.table('venue_fingerprints').select('*').limit(1))
         except:
             logger.info("Creating fingerprint tables")
             # In production, use proper database migrations
@@ -484,9 +483,9 @@ class FingerprintService:
             
             # Query database for similar fingerprints
             table_name = f'{fingerprint_type}_fingerprints'
-            result = self.supabase.client.table(table_name).select(
+            result = await run_query(self.supabase.client.table(table_name).select(
                 'fingerprint_hash, mcc, confidence, venue_name, location_hash'
-            ).execute()
+            ))
             
             if not result.data:
                 return {'matched': False, 'confidence': 0.0}
@@ -646,9 +645,14 @@ class FingerprintService:
         # Analyze RSSI distribution for proximity zones
         rssi_values = [b.get('rssi', -100) for b in ble_data]
         
-        immediate = len([r for r in rssi_values if r > -50])    # Very close
-        near = len([r for r in rssi_values if -70 <= r <= -50]) # Near
-        far = len([r for r in rssi_values if r < -70])          # Far
+        immediate = near = far = 0
+        for r in rssi_values:
+            if r > -50:
+                immediate += 1  # Very close
+            elif r >= -70:
+                near += 1       # Near
+            else:
+                far += 1        # Far
         
         analysis['proximity_zones'] = {
             'immediate': immediate,
@@ -679,9 +683,9 @@ class FingerprintService:
             fingerprint_hash = features['fingerprint_hash']
             
             # Query historical data
-            result = self.supabase.client.table('wifi_fingerprints').select(
+            result = await run_query(self.supabase.client.table('wifi_fingerprints').select(
                 'mcc, confidence, created_at, transaction_count'
-            ).eq('fingerprint_hash', fingerprint_hash).execute()
+            ).eq('fingerprint_hash', fingerprint_hash))
             
             if result.data:
                 # Calculate weighted confidence based on historical success
@@ -721,9 +725,9 @@ class FingerprintService:
             fingerprint_hash = features['fingerprint_hash']
             
             # Query historical data
-            result = self.supabase.client.table('ble_fingerprints').select(
+            result = await run_query(self.supabase.client.table('ble_fingerprints').select(
                 'mcc, confidence, created_at, transaction_count'
-            ).eq('fingerprint_hash', fingerprint_hash).execute()
+            ).eq('fingerprint_hash', fingerprint_hash))
             
             if result.data:
                 historical_entries = result.data
@@ -1051,7 +1055,7 @@ class FingerprintService:
             if not self.supabase or not result.get('predicted', False):
                 return
             
-            self.supabase.client.table('wifi_fingerprints').upsert({
+            await run_query(self.supabase.client.table('wifi_fingerprints').upsert({
                 'fingerprint_hash': features['fingerprint_hash'],
                 'mcc': result['mcc'],
                 'confidence': result['confidence'],
@@ -1059,7 +1063,7 @@ class FingerprintService:
                 'features': json.dumps(features),
                 'created_at': datetime.now().isoformat(),
                 'transaction_count': 1
-            }).execute()
+            }))
             
         except Exception as e:
             logger.error(f"Error storing WiFi fingerprint: {str(e)}")
@@ -1070,7 +1074,7 @@ class FingerprintService:
             if not self.supabase or not result.get('predicted', False):
                 return
             
-            self.supabase.client.table('ble_fingerprints').upsert({
+            await run_query(self.supabase.client.table('ble_fingerprints').upsert({
                 'fingerprint_hash': features['fingerprint_hash'],
                 'mcc': result['mcc'],
                 'confidence': result['confidence'],
@@ -1078,7 +1082,7 @@ class FingerprintService:
                 'features': json.dumps(features),
                 'created_at': datetime.now().isoformat(),
                 'transaction_count': 1
-            }).execute()
+            }))
             
         except Exception as e:
             logger.error(f"Error storing BLE fingerprint: {str(e)}")
@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 import json
+import time
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 import numpy as np
@@ -15,7 +16,7 @@ from geopy.distance import geodesic
 import h3
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..database.supabase_client import get_supabase_client, run_query
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +38,9 @@ class HistoricalService:
             
             # Test database connectivity if available
             if self.supabase.is_available:
-                # Supabase operations are synchronous, no await needed
-                self.supabase.client.table('transaction_history').select('*').limit(1).execute()
-                self.supabase.client.table('area_patterns').select('*').limit(1).execute()
-                self.supabase.client.table('merchant_locations').select('*').limit(1).execute()
+                await run_query(self.supabase.client.table('transaction_history').select('*').limit(1))
+                await run_query(self.supabase.client.table('area_patterns').select('*').limit(1))
+                await run_query(self.supabase.client.table('merchant_locations').select('*').limit(1))
                 logger.info("Historical service database connectivity verified")
             else:
                 logger.warning("Historical service: Supabase not available, using fallback")
@@ -125,12 +125,12 @@ class HistoricalService:
             cutoff_date = (datetime.now() - timedelta(days=180)).isoformat()
             
             # Use PostGIS ST_DWithin for spatial query
-            result = self.supabase.client.rpc('get_transactions_within_radius', {
+            result = await run_query(self.supabase.client.rpc('get_transactions_within_radius', {
                 'center_lat': lat,
                 'center_lon': lon,
                 'radius_meters': radius_meters,
                 'since_date': cutoff_date
-            }).execute()
+            }))
             
             if not result.data or len(result.data) < 10:
                 return {
@@ -141,14 +141,26 @@ class HistoricalService:
             
             transactions = result.data
             
-            # Analyze transaction patterns
-            amounts = [float(t['amount']) for t in transactions if t.get('amount')]
-            mccs = [t['mcc'] for t in transactions if t.get('mcc')]
-            merchants = [t['merchant_name'] for t in transactions if t.get('merchant_name')]
-            success_rates = [t['success'] for t in transactions if 'success' in t]
+            # Extract every per-transaction field in a single pass
+            amounts = []
+            mccs = []
+            merchants = []
+            success_rates = []
+            times = []
+            for t in transactions:
+                if t.get('amount'):
+                    amounts.append(float(t['amount']))
+                if t.get('mcc'):
+                    mccs.append(t['mcc'])
+                if t.get('merchant_name'):
+                    merchants.append(t['merchant_name'])
+                if 'success' in t:
+                    success_rates.append(t['success'])
+                times.append(t['transaction_time'])
             
             # Calculate MCC distribution and confidence
             mcc_counts = Counter(mccs)
+            merchant_counts = Counter(merchants)
             total_transactions = len(mccs)
             
             mcc_distribution = {}
@@ -172,8 +184,8 @@ class HistoricalService:
                 'analyzed': True,
                 'transaction_count': len(transactions),
                 'date_range': {
-                    'earliest': min([t['transaction_time'] for t in transactions]),
-                    'latest': max([t['transaction_time'] for t in transactions])
+                    'earliest': min(times),
+                    'latest': max(times)
                 },
                 'amount_statistics': {
                     'avg': np.mean(amounts) if amounts else 0,
@@ -189,9 +201,9 @@ class HistoricalService:
                     'entropy': self._calculate_mcc_entropy(mcc_counts)
                 },
                 'merchant_analysis': {
-                    'unique_merchants': len(set(merchants)),
-                    'merchant_frequency': dict(Counter(merchants)),
-                    'top_merchants': Counter(merchants).most_common(5)
+                    'unique_merchants': len(merchant_counts),
+                    'merchant_frequency': dict(merchant_counts),
+                    'top_merchants': merchant_counts.most_common(5)
                 },
                 'success_analysis': {
                     'success_rate': sum(success_rates) / len(success_rates) if success_rates else 0,
@@ -211,11 +223,11 @@ class HistoricalService:
                 return {'analyzed': False}
             
             # Query merchant locations within the area
-            result = self.supabase.client.rpc('get_merchants_within_radius', {
+            result = await run_query(self.supabase.client.rpc('get_merchants_within_radius', {
                 'center_lat': lat,
                 'center_lon': lon,
                 'radius_meters': radius_meters
-            }).execute()
+            }))
             
             if not result.data:
                 return {'analyzed': False, 'reason': 'no_merchants_found'}
@@ -289,12 +301,12 @@ class HistoricalService:
             # Query temporal transaction patterns
             cutoff_date = (datetime.now() - timedelta(days=90)).isoformat()
             
-            result = self.supabase.client.rpc('get_temporal_patterns_within_radius', {
+            result = await run_query(self.supabase.client.rpc('get_temporal_patterns_within_radius', {
                 'center_lat': lat,
                 'center_lon': lon,
                 'radius_meters': radius_meters,
                 'since_date': cutoff_date
-            }).execute()
+            }))
             
             if not result.data:
                 return {'analyzed': False, 'reason': 'no_temporal_data'}
@@ -304,8 +316,7 @@ class HistoricalService:
             # Extract temporal features
             hours = []
             days_of_week = []
-            mccs_by_hour = defaultdict(list)
-            mccs_by_day = defaultdict(list)
+            txn_mccs = []
             
             for t in transactions:
                 if t.get('transaction_time') and t.get('mcc'):
@@ -315,40 +326,37 @@ class HistoricalService:
                     
                     hours.append(hour)
                     days_of_week.append(day_of_week)
-                    mccs_by_hour[hour].append(t['mcc'])
-                    mccs_by_day[day_of_week].append(t['mcc'])
+                    txn_mccs.append(t['mcc'])
             
             # Analyze patterns
             hour_distribution = Counter(hours)
             day_distribution = Counter(days_of_week)
             
-            # Find peak times for different MCCs
+            # Hour x MCC count matrix, built in one scatter-add
+            mcc_labels, mcc_ids = np.unique(np.array(txn_mccs, dtype=str), return_inverse=True)
+            hour_mcc = np.zeros((24, len(mcc_labels)), dtype=np.int32)
+            np.add.at(hour_mcc, (np.array(hours, dtype=np.intp), mcc_ids), 1)
+            
+            # Top 3 peak hours for each MCC (column-wise sort, strongest first)
+            top_hours = np.argsort(-hour_mcc, axis=0, kind='stable')[:3]
             peak_hours_by_mcc = {}
-            for hour, mcc_list in mccs_by_hour.items():
-                mcc_counts = Counter(mcc_list)
-                for mcc, count in mcc_counts.items():
-                    if mcc not in peak_hours_by_mcc:
-                        peak_hours_by_mcc[mcc] = []
-                    peak_hours_by_mcc[mcc].append({'hour': hour, 'count': count})
-            
-            # Sort peak hours for each MCC
-            for mcc in peak_hours_by_mcc:
-                peak_hours_by_mcc[mcc].sort(key=lambda x: x['count'], reverse=True)
-                peak_hours_by_mcc[mcc] = peak_hours_by_mcc[mcc][:3]  # Top 3 peak hours
+            for j, mcc in enumerate(mcc_labels.tolist()):
+                peak_hours_by_mcc[mcc] = [
+                    {'hour': int(h), 'count': int(hour_mcc[h, j])}
+                    for h in top_hours[:, j] if hour_mcc[h, j] > 0
+                ]
             
             # Current time analysis
             current_time_analysis = {}
-            if current_time:
-                current_hour = current_time.hour
-                current_day = current_time.weekday()
-                
-                # Find MCCs most active at current time
-                current_hour_mccs = Counter(mccs_by_hour.get(current_hour, []))
-                current_day_mccs = Counter(mccs_by_day.get(current_day, []))
+            if current_time and len(mcc_labels):
+                # Find MCCs most active at current hour
+                current_hour_counts = hour_mcc[current_time.hour]
+                total_current_hour = int(current_hour_counts.sum())
                 
-                if current_hour_mccs:
-                    most_likely_mcc, count = current_hour_mccs.most_common(1)[0]
-                    total_current_hour = sum(current_hour_mccs.values())
+                if total_current_hour:
+                    best = int(current_hour_counts.argmax())
+                    most_likely_mcc = str(mcc_labels[best])
+                    count = int(current_hour_counts[best])
                     confidence = min(0.8, count / total_current_hour + 0.2)
                     
                     current_time_analysis = {
@@ -389,12 +397,12 @@ class HistoricalService:
             # Query behavioral patterns
             cutoff_date = (datetime.now() - timedelta(days=60)).isoformat()
             
-            result = self.supabase.client.rpc('get_behavioral_patterns_within_radius', {
+            result = await run_query(self.supabase.client.rpc('get_behavioral_patterns_within_radius', {
                 'center_lat': lat,
                 'center_lon': lon,
                 'radius_meters': radius_meters,
                 'since_date': cutoff_date
-            }).execute()
+            }))
             
             if not result.data:
                 return {'analyzed': False, 'reason': 'no_behavioral_data'}
@@ -416,22 +424,26 @@ class HistoricalService:
             # Analyze each MCC's behavioral patterns
             behavioral_analysis = {}
             for mcc, mcc_transactions in mcc_behaviors.items():
-                amounts = [t['amount'] for t in mcc_transactions]
-                tips = [t['has_tip'] for t in mcc_transactions]
-                success_rates = [t['success'] for t in mcc_transactions]
+                # One array per column; each statistic is a single reduction over it
+                count = len(mcc_transactions)
+                amounts = np.fromiter((t['amount'] for t in mcc_transactions), dtype=np.float64, count=count)
+                tips = np.fromiter((bool(t['has_tip']) for t in mcc_transactions), dtype=np.bool_, count=count)
+                successes = np.fromiter((bool(t['success']) for t in mcc_transactions), dtype=np.bool_, count=count)
+                avg_amount = amounts.mean()
+                std_amount = amounts.std()
                 
                 behavioral_analysis[mcc] = {
-                    'transaction_count': len(mcc_transactions),
+                    'transaction_count': count,
                     'amount_patterns': {
-                        'avg': np.mean(amounts),
+                        'avg': avg_amount,
                         'median': np.median(amounts),
-                        'std': np.std(amounts),
-                        'range': [min(amounts), max(amounts)]
+                        'std': std_amount,
+                        'range': [float(amounts.min()), float(amounts.max())]
                     },
                     'behavioral_indicators': {
-                        'tip_frequency': sum(tips) / len(tips) if tips else 0,
-                        'success_rate': sum(success_rates) / len(success_rates) if success_rates else 0,
-                        'amount_consistency': 1.0 / (1.0 + np.std(amounts) / np.mean(amounts)) if amounts else 0
+                        'tip_frequency': np.count_nonzero(tips) / count,
+                        'success_rate': np.count_nonzero(successes) / count,
+                        'amount_consistency': 1.0 / (1.0 + std_amount / avg_amount)
                     }
                 }
             
@@ -441,31 +453,34 @@ class HistoricalService:
                 current_hour = current_time.hour
                 is_weekend = current_time.weekday() >= 5
                 
-                # Find MCCs with similar transaction patterns
-                matching_mccs = []
-                for mcc, patterns in behavioral_analysis.items():
-                    amount_avg = patterns['amount_patterns']['avg']
-                    amount_std = patterns['amount_patterns']['std']
-                    
-                    # Check if current amount fits the pattern
-                    if amount_avg - 2*amount_std <= current_amount <= amount_avg + 2*amount_std:
-                        # Calculate similarity score
-                        amount_similarity = 1.0 - abs(current_amount - amount_avg) / (amount_avg + 1)
-                        
-                        matching_mccs.append({
-                            'mcc': mcc,
-                            'similarity_score': amount_similarity,
-                            'confidence': min(0.8, amount_similarity * patterns['transaction_count'] / 100),
-                            'supporting_transactions': patterns['transaction_count']
-                        })
+                # Score every MCC's amount pattern at once
+                mcc_list = list(behavioral_analysis)
+                avg = np.array([behavioral_analysis[m]['amount_patterns']['avg'] for m in mcc_list], dtype=np.float64)
+                std = np.array([behavioral_analysis[m]['amount_patterns']['std'] for m in mcc_list], dtype=np.float64)
+                counts = np.array([behavioral_analysis[m]['transaction_count'] for m in mcc_list], dtype=np.float64)
+                
+                # Current amount must fall within two standard deviations of the MCC's mean
+                fits = np.abs(current_amount - avg) <= 2 * std
+                similarity = 1.0 - np.abs(current_amount - avg) / (avg + 1)
+                confidence = np.minimum(0.8, similarity * counts / 100)
                 
-                # Sort by similarity and confidence
-                matching_mccs.sort(key=lambda x: x['confidence'], reverse=True)
+                # Top 5 matches by confidence; dicts are only built for those
+                matched = np.flatnonzero(fits)
+                top = matched[np.argsort(-confidence[matched], kind='stable')[:5]]
+                matching_mccs = [
+                    {
+                        'mcc': mcc_list[i],
+                        'similarity_score': float(similarity[i]),
+                        'confidence': float(confidence[i]),
+                        'supporting_transactions': int(counts[i])
+                    }
+                    for i in top
+                ]
                 
                 if matching_mccs:
                     current_transaction_analysis = {
                         'best_match': matching_mccs[0],
-                        'all_matches': matching_mccs[:5],  # Top 5 matches
+                        'all_matches': matching_mccs,  # Top 5 matches
                         'basis': 'amount_behavioral_pattern'
                     }
             
@@ -496,12 +511,12 @@ class HistoricalService:
             for hex_id in surrounding_hexes:
                 hex_center = h3.h3_to_geo(hex_id)
                 
-                result = self.supabase.client.rpc('get_hex_transaction_summary', {
+                result = await run_query(self.supabase.client.rpc('get_hex_transaction_summary', {
                     'hex_id': hex_id,
                     'center_lat': hex_center[0],
                     'center_lon': hex_center[1],
                     'days_back': 30
-                }).execute()
+                }))
                 
                 if result.data:
                     hex_data[hex_id] = result.data[0]
@@ -684,15 +699,10 @@ class HistoricalService:
         if not mcc_counts:
             return 0.0
         
-        total = sum(mcc_counts.values())
-        entropy = 0.0
-        
-        for count in mcc_counts.values():
-            probability = count / total
-            if probability > 0:
-                entropy -= probability * np.log2(probability)
+        counts = np.fromiter(mcc_counts.values(), dtype=np.float64, count=len(mcc_counts))
+        probabilities = counts[counts > 0] / counts.sum()
         
-        return entropy
+        return float(-(probabilities * np.log2(probabilities)).sum())
     
     async def _get_cached_area_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached area analysis result"""
@@ -700,15 +710,15 @@ class HistoricalService:
             if not self.supabase:
                 return None
             
-            result = self.supabase.client.table('area_pattern_cache').select('*').eq(
+            result = await run_query(self.supabase.client.table('area_pattern_cache').select('*').eq(
                 'cache_key', cache_key
-            ).order('created_at', desc=True).limit(1).execute()
+            ).order('created_at', desc=True).limit(1))
             
             if result.data:
                 cache_entry = result.data[0]
                 return {
                     'data': json.loads(cache_entry['analysis_data']),
-                    'cached_at': datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00'))
+                    'cached_at': datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00')).timestamp()
                 }
         
         except Exception as e:
@@ -718,8 +728,8 @@ class HistoricalService:
     
     def _is_cache_valid(self, cached_result: Dict[str, Any]) -> bool:
         """Check if cached result is still valid"""
-        cached_at = cached_result['cached_at']
-        return datetime.now() - cached_at < self.cache_duration
+        # cached_at is epoch seconds, so no naive/aware datetime arithmetic is needed
+        return time.time() - cached_result['cached_at'] < self.cache_duration.total_seconds()
     
     def _enhance_cached_analysis(self, cached_result: Dict[str, Any], 
                                 transaction_amount: Optional[float],
@@ -747,11 +757,11 @@ class HistoricalService:
             if not self.supabase:
                 return
             
-            self.supabase.client.table('area_pattern_cache').upsert({
+            await run_query(self.supabase.client.table('area_pattern_cache').upsert({
                 'cache_key': cache_key,
                 'analysis_data': json.dumps(analysis),
                 'created_at': datetime.now().isoformat()
-            }).execute()
+            }))
             
         except Exception as e:
             logger.error(f"Error caching area analysis: {str(e)}")
@@ -800,7 +810,7 @@ class HistoricalService:
                 'created_at': datetime.now().isoformat()
             }
             
-            self.supabase.client.table('transaction_history').insert(storage_data).execute()
+            await run_query(self.supabase.client.table('transaction_history').insert(storage_data))
             
             return {'success': True, 'transaction_id': transaction_data.get('transaction_id')}
             
@@ -815,12 +825,12 @@ class HistoricalService:
                 return {'error': 'Database not available'}
             
             # Get comprehensive area statistics
-            result = self.supabase.client.rpc('get_area_comprehensive_stats', {
+            result = await run_query(self.supabase.client.rpc('get_area_comprehensive_stats', {
                 'center_lat': lat,
                 'center_lon': lon,
                 'radius_meters': radius_meters,
                 'days_back': 90
-            }).execute()
+            }))
             
             if result.data:
                 stats = result.data[0]
@@ -4,6 +4,7 @@ Uses OpenAI GPT models for intelligent merchant categorization and reasoning
 """
 
 import asyncio
+import functools
 import logging
 from typing import Dict, List, Optional, Any, Tuple
 import json
@@ -15,11 +16,25 @@ import openai
 from openai import AsyncOpenAI
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..core.http_client import get_http_client
+from ..database.supabase_client import get_supabase_client, run_query
 from app.utils.mcc_categories import get_all_mcc_categories
 
 logger = logging.getLogger(__name__)
 
+# Per-request timeout for chat completions, in seconds; batched completions need far more than the shared client's default
+_LLM_TIMEOUT_SECONDS = 60.0
+
+# Most completion tokens the model accepts in one response (gpt-4o-mini's cap)
+_MAX_COMPLETION_TOKENS = 16_384
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client for an API key so services reuse one connection pool"""
+    return AsyncOpenAI(api_key=api_key, http_client=get_http_client(), timeout=_LLM_TIMEOUT_SECONDS)
+
+
 class LLMService:
     """Enhanced LLM service for intelligent MCC prediction"""
     
@@ -32,6 +47,7 @@ class LLMService:
         
         # MCC knowledge base - Use centralized utility
         self.mcc_categories = get_all_mcc_categories()
+        self.mcc_options = "\n".join(f"- {code}: {desc}" for code, desc in self.mcc_categories.items())
         
     async def initialize(self):
         """Initialize the LLM service"""
@@ -41,7 +57,7 @@ class LLMService:
                 logger.warning("OpenAI API key not found - LLM service will be disabled")
                 return
             
-            self.client = AsyncOpenAI(api_key=api_key)
+            self.client = get_openai_client(api_key)
             
             # Test the connection
             await self._test_connection()
@@ -119,7 +135,7 @@ class LLMService:
             """
             
             # Execute the SQL using Supabase
-            response = self.supabase.client.rpc('exec_sql', {'sql': create_table_sql}).execute()
+            response = await run_query(self.supabase.client.rpc('exec_sql', {'sql': create_table_sql}))
             
             logger.info("LLM database tables created successfully")
             
@@ -171,6 +187,52 @@ class LLMService:
             logger.error(f"Error in LLM MCC enhancement: {str(e)}")
             return self._get_fallback_result(existing_predictions)
     
+    async def enhance_mcc_prediction_batch(self,
+                                         merchants: List[Dict[str, Any]],
+                                         existing_predictions: List[List[Dict[str, Any]]],
+                                         contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enhance several MCC predictions with a single LLM call
+        
+        Args:
+            merchants: Merchant information, one entry per prediction
+            existing_predictions: Predictions from other services for each merchant
+            contexts: Additional context for each merchant
+        
+        Returns:
+            One enhanced result per merchant, in input order
+        """
+        if not self.client:
+            return [self._get_disabled_result() for _ in merchants]
+        
+        try:
+            prompt = self._build_batch_analysis_prompt(merchants, existing_predictions, contexts)
+            llm_response = await self._get_llm_analysis(
+                prompt, max_tokens=min(self.max_tokens * len(merchants), _MAX_COMPLETION_TOKENS)
+            )
+            results = json.loads(llm_response).get('results', [])
+            results_by_index = {result.get('index', i): result for i, result in enumerate(results)}
+        except Exception as e:
+            logger.error(f"Error in batch LLM MCC enhancement: {str(e)}")
+            return [self._get_fallback_result(predictions) for predictions in existing_predictions]
+        
+        enhanced_results = []
+        stores = []
+        for i, (merchant_data, predictions) in enumerate(zip(merchants, existing_predictions)):
+            try:
+                parsed_result = self._validate_llm_result(results_by_index[i])
+                enhanced_result = self._combine_with_existing_predictions(parsed_result, predictions)
+                stores.append(self._store_llm_analysis(merchant_data, parsed_result, enhanced_result))
+                enhanced_results.append(enhanced_result)
+            except Exception as e:
+                logger.error(f"Invalid batch LLM result for merchant {i}: {str(e)}")
+                enhanced_results.append(self._get_fallback_result(predictions))
+        
+        # Store every analysis at once rather than one insert after another
+        await asyncio.gather(*stores)
+        
+        return enhanced_results
+    
     async def analyze_merchant_name(self, merchant_name: str, 
                                   additional_info: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -254,6 +316,78 @@ class LLMService:
             logger.error(f"Error analyzing business description: {str(e)}")
             return self._get_disabled_result()
     
+    @functools.cached_property
+    def _merchant_analysis_prefix(self) -> str:
+        """Fixed instructions, MCC codes and response schema shared by every merchant analysis prompt"""
+        return f"""
+You are an expert in merchant categorization and MCC (Merchant Category Code) classification. 
+Analyze the merchant information at the end of this prompt and provide the most accurate MCC prediction.
+
+AVAILABLE MCC CODES:
+{self.mcc_options}
+
+TASK:
+1. Analyze all available information about this merchant
+2. Consider the existing predictions and their confidence levels
+3. Determine the most appropriate MCC code
+4. Provide confidence level (0.0 to 1.0)
+5. Explain your reasoning
+6. Suggest alternative MCCs if uncertain
+
+RESPONSE FORMAT (JSON):
+{{
+    "predicted_mcc": "XXXX",
+    "confidence": 0.XX,
+    "reasoning": "Detailed explanation of why this MCC was chosen",
+    "alternative_mccs": [
+        {{"mcc": "XXXX", "confidence": 0.XX, "reason": "explanation"}},
+        {{"mcc": "XXXX", "confidence": 0.XX, "reason": "explanation"}}
+    ],
+    "key_factors": ["factor1", "factor2", "factor3"],
+    "certainty_level": "high|medium|low"
+}}
+
+Focus on accuracy and provide clear reasoning for your decision.
+"""
+    
+    @functools.cached_property
+    def _batch_analysis_prefix(self) -> str:
+        """Fixed instructions, MCC codes and response schema shared by every batch analysis prompt"""
+        return f"""
+You are an expert in merchant categorization and MCC (Merchant Category Code) classification. 
+Analyze each of the merchants listed at the end of this prompt independently and provide the most accurate MCC prediction for each.
+
+AVAILABLE MCC CODES:
+{self.mcc_options}
+
+TASK (for each merchant):
+1. Analyze all available information about this merchant
+2. Consider the existing predictions and their confidence levels
+3. Determine the most appropriate MCC code
+4. Provide confidence level (0.0 to 1.0)
+5. Explain your reasoning
+6. Suggest alternative MCCs if uncertain
+
+RESPONSE FORMAT (JSON), exactly one result per merchant with its index:
+{{
+    "results": [
+        {{
+            "index": 0,
+            "predicted_mcc": "XXXX",
+            "confidence": 0.XX,
+            "reasoning": "Detailed explanation of why this MCC was chosen",
+            "alternative_mccs": [
+                {{"mcc": "XXXX", "confidence": 0.XX, "reason": "explanation"}}
+            ],
+            "key_factors": ["factor1", "factor2", "factor3"],
+            "certainty_level": "high|medium|low"
+        }}
+    ]
+}}
+
+Focus on accuracy and provide clear reasoning for each decision.
+"""
+    
     def _build_merchant_analysis_prompt(self, merchant_data: Dict[str, Any], 
                                       existing_predictions: List[Dict[str, Any]],
                                       context: Dict[str, Any]) -> str:
@@ -265,9 +399,6 @@ class LLMService:
         location_info = merchant_data.get('location_info', {})
         venue_types = merchant_data.get('venue_types', [])
         
-        # Build MCC options
-        mcc_options = "\n".join([f"- {code}: {desc}" for code, desc in self.mcc_categories.items()])
-        
         # Build existing predictions summary
         predictions_summary = ""
         if existing_predictions:
@@ -282,10 +413,8 @@ class LLMService:
             for key, value in context.items():
                 context_info += f"- {key}: {value}\n"
         
-        prompt = f"""
-You are an expert in merchant categorization and MCC (Merchant Category Code) classification. 
-Analyze the following merchant information and provide the most accurate MCC prediction.
-
+        # Merchant-specific data goes last so the fixed prefix can be prompt-cached
+        prompt = f"""{self._merchant_analysis_prefix}
 MERCHANT INFORMATION:
 - Name: {merchant_name}
 - Business Description: {business_description}
@@ -295,32 +424,35 @@ MERCHANT INFORMATION:
 {predictions_summary}
 
 {context_info}
-
-AVAILABLE MCC CODES:
-{mcc_options}
-
-TASK:
-1. Analyze all available information about this merchant
-2. Consider the existing predictions and their confidence levels
-3. Determine the most appropriate MCC code
-4. Provide confidence level (0.0 to 1.0)
-5. Explain your reasoning
-6. Suggest alternative MCCs if uncertain
-
-RESPONSE FORMAT (JSON):
-{{
-    "predicted_mcc": "XXXX",
-    "confidence": 0.XX,
-    "reasoning": "Detailed explanation of why this MCC was chosen",
-    "alternative_mccs": [
-        {{"mcc": "XXXX", "confidence": 0.XX, "reason": "explanation"}},
-        {{"mcc": "XXXX", "confidence": 0.XX, "reason": "explanation"}}
-    ],
-    "key_factors": ["factor1", "factor2", "factor3"],
-    "certainty_level": "high|medium|low"
-}}
-
-Focus on accuracy and provide clear reasoning for your decision.
+"""
+        
+        return prompt
+    
+    def _build_batch_analysis_prompt(self, merchants: List[Dict[str, Any]],
+                                     existing_predictions: List[List[Dict[str, Any]]],
+                                     contexts: List[Dict[str, Any]]) -> str:
+        """Build one prompt covering several merchants, sharing the MCC code list"""
+        
+        merchant_sections = []
+        for i, (merchant_data, predictions, context) in enumerate(zip(merchants, existing_predictions, contexts)):
+            predictions_summary = "; ".join(
+                f"{pred.get('method', 'Unknown')}: MCC {pred.get('mcc', 'Unknown')} (confidence: {pred.get('confidence', 0):.2f})"
+                for pred in predictions
+            )
+            context_info = "; ".join(f"{key}: {value}" for key, value in (context or {}).items())
+            merchant_sections.append(f"""MERCHANT {i}:
+- Name: {merchant_data.get('merchant_name', 'Unknown')}
+- Business Description: {merchant_data.get('business_description', '')}
+- Location: {merchant_data.get('location_info', {})}
+- Venue Types: {merchant_data.get('venue_types', [])}
+- Existing Predictions: {predictions_summary or 'none'}
+- Additional Context: {context_info or 'none'}""")
+        
+        merchants_info = "\n\n".join(merchant_sections)
+        
+        # Merchant-specific data goes last so the fixed prefix can be prompt-cached
+        prompt = f"""{self._batch_analysis_prefix}
+{merchants_info}
 """
         
         return prompt
@@ -329,7 +461,7 @@ Focus on accuracy and provide clear reasoning for your decision.
                                   additional_info: Dict[str, Any]) -> str:
         """Build merchant name analysis prompt"""
         
-        mcc_options = "\n".join([f"- {code}: {desc}" for code, desc in self.mcc_categories.items()])
+        mcc_options = self.mcc_options
         
         additional_context = ""
         if additional_info:
@@ -391,7 +523,7 @@ RESPONSE FORMAT (JSON):
             for key, value in context.items():
                 context_info += f"- {key}: {value}\n"
         
-        mcc_options = "\n".join([f"- {code}: {desc}" for code, desc in self.mcc_categories.items()])
+        mcc_options = self.mcc_options
         
         prompt = f"""
 You have multiple conflicting MCC predictions for the same merchant. 
@@ -442,7 +574,7 @@ Be thorough in your analysis and provide clear reasoning for your decision.
             for key, value in venue_data.items():
                 venue_context += f"- {key}: {value}\n"
         
-        mcc_options = "\n".join([f"- {code}: {desc}" for code, desc in self.mcc_categories.items()])
+        mcc_options = self.mcc_options
         
         prompt = f"""
 Analyze this business description and determine the most appropriate MCC category.
@@ -478,7 +610,7 @@ RESPONSE FORMAT (JSON):
         
         return prompt
     
-    async def _get_llm_analysis(self, prompt: str) -> str:
+    async def _get_llm_analysis(self, prompt: str, max_tokens: Optional[int] = None) -> str:
         """Get analysis from LLM"""
         try:
             response = await self.client.chat.completions.create(
@@ -490,7 +622,7 @@ RESPONSE FORMAT (JSON):
                     },
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=self.max_tokens,
+                max_tokens=max_tokens or self.max_tokens,
                 temperature=self.temperature,
                 response_format={"type": "json_object"}
             )
@@ -506,29 +638,7 @@ RESPONSE FORMAT (JSON):
         try:
             # Parse JSON response
             parsed = json.loads(response)
-            
-            # Validate required fields
-            required_fields = ['predicted_mcc', 'confidence', 'reasoning']
-            for field in required_fields:
-                if field not in parsed:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Validate MCC format
-            mcc = parsed['predicted_mcc']
-            if not re.match(r'^\d{4}$', str(mcc)):
-                raise ValueError(f"Invalid MCC format: {mcc}")
-            
-            # Validate confidence range
-            confidence = float(parsed['confidence'])
-            if not 0.0 <= confidence <= 1.0:
-                raise ValueError(f"Confidence out of range: {confidence}")
-            
-            # Add metadata
-            parsed['method'] = 'llm_analysis'
-            parsed['source'] = 'openai_gpt'
-            parsed['timestamp'] = datetime.now().isoformat()
-            
-            return parsed
+            return self._validate_llm_result(parsed)
             
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON response from LLM: {e}")
@@ -537,6 +647,31 @@ RESPONSE FORMAT (JSON):
             logger.error(f"Error parsing LLM response: {str(e)}")
             raise
     
+    def _validate_llm_result(self, parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a parsed LLM result and add metadata"""
+        # Validate required fields
+        required_fields = ['predicted_mcc', 'confidence', 'reasoning']
+        for field in required_fields:
+            if field not in parsed:
+                raise ValueError(f"Missing required field: {field}")
+        
+        # Validate MCC format
+        mcc = parsed['predicted_mcc']
+        if not re.match(r'^\d{4}$', str(mcc)):
+            raise ValueError(f"Invalid MCC format: {mcc}")
+        
+        # Validate confidence range
+        confidence = float(parsed['confidence'])
+        if not 0.0 <= confidence <= 1.0:
+            raise ValueError(f"Confidence out of range: {confidence}")
+        
+        # Add metadata
+        parsed['method'] = 'llm_analysis'
+        parsed['source'] = 'openai_gpt'
+        parsed['timestamp'] = datetime.now().isoformat()
+        
+        return parsed
+    
     def _combine_with_existing_predictions(self, llm_result: Dict[str, Any], 
                                          existing_predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Combine LLM analysis with existing predictions"""
@@ -603,7 +738,7 @@ RESPONSE FORMAT (JSON):
                 'created_at': datetime.now().isoformat()
             }
             
-            self.supabase.client.table('llm_analyses').insert(analysis_record).execute()
+            await run_query(self.supabase.client.table('llm_analyses').insert(analysis_record))
             
         except Exception as e:
             logger.error(f"Error storing LLM analysis: {str(e)}")
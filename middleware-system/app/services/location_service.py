@@ -9,28 +9,42 @@ from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 import json
 import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import os
 
-import googlemaps
-import httpx
+import orjson
 from geopy.distance import geodesic
 from shapely.geometry import Point, Polygon
 import h3
 import numpy as np
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..core.http_client import get_http_client
+from ..database.supabase_client import get_supabase_client, run_query
 from app.utils.mcc_categories import get_mcc_for_google_place_type, get_mcc_for_foursquare_category
 from ..config.enhanced_services import EnhancedServicesConfig
 
 logger = logging.getLogger(__name__)
 
+# Google Places web service endpoints, called through the shared async HTTP client
+_GOOGLE_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+_GOOGLE_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+_GOOGLE_DETAIL_FIELDS = ",".join([
+    'geometry',
+    'geometry/viewport',
+    'geometry/viewport/northeast',
+    'geometry/viewport/southwest',
+    'name',
+    'type'
+])
+
 class LocationService:
     """Enhanced location service with real API integrations"""
     
     def __init__(self):
-        self.google_maps_client = None
+        self.google_api_key = None
         self.foursquare_api_key = None
         self.cache_duration = timedelta(hours=6)  # Cache results for 6 hours
         self.supabase = None
@@ -38,8 +52,11 @@ class LocationService:
         # Enhanced consistency settings
         self.min_search_radius = EnhancedServicesConfig.MIN_SEARCH_RADIUS_METERS
         self.location_cluster_threshold = EnhancedServicesConfig.LOCATION_CLUSTER_THRESHOLD_METERS
-        self.consistency_cache = {}  # In-memory cache for recent locations
+        self.consistency_cache = OrderedDict()  # Recent locations, oldest first
+        self.consistency_cache_size = 100
+        self._inflight: Dict[int, asyncio.Future] = {}  # coordinate key -> analysis already running
         self.cache_duration_minutes = EnhancedServicesConfig.LOCATION_CACHE_DURATION_MINUTES
+        self._consistency_ttl_ns = int(self.cache_duration_minutes * 60 * 1_000_000_000)
         self.enable_redundant_calls = EnhancedServicesConfig.ENABLE_REDUNDANT_API_CALLS
         self.max_redundant_calls = EnhancedServicesConfig.MAX_REDUNDANT_API_CALLS
         
@@ -57,7 +74,7 @@ class LocationService:
             # Initialize Google Maps API if key is available
             google_api_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', None)
             if google_api_key:
-                self.google_maps_client = googlemaps.Client(key=google_api_key)
+                self.google_api_key = google_api_key
                 logger.info("Google Maps client initialized successfully")
             else:
                 logger.warning("Google Maps API key not found - Google Places functionality disabled")
@@ -84,14 +101,16 @@ class LocationService:
         Find if this location is close to a recently cached location
         Returns the clustered location coordinates if found
         """
-        current_time = datetime.now()
+        now_ns = time.monotonic_ns()
         
-        for cached_key, cached_data in list(self.consistency_cache.items()):
-            # Remove expired entries
-            if current_time - cached_data['timestamp'] > timedelta(minutes=self.cache_duration_minutes):
-                del self.consistency_cache[cached_key]
-                continue
-                
+        # Entries are kept in write order, so expired ones form a prefix
+        while self.consistency_cache:
+            oldest = next(iter(self.consistency_cache.values()))
+            if now_ns - oldest['timestamp'] <= self._consistency_ttl_ns:
+                break
+            self.consistency_cache.popitem(last=False)
+        
+        for cached_data in self.consistency_cache.values():
             cached_lat, cached_lng = cached_data['coordinates']
             distance = geodesic((lat, lng), (cached_lat, cached_lng)).meters
             
@@ -101,33 +120,34 @@ class LocationService:
         
         return None
     
+    @staticmethod
+    def _coordinate_key(lat: float, lng: float) -> int:
+        """Pack coordinates at micro-degree precision into one 64-bit int key"""
+        return ((round(lat * 1_000_000) & 0xFFFFFFFF) << 32) | (round(lng * 1_000_000) & 0xFFFFFFFF)
+    
     def _cache_location_result(self, lat: float, lng: float, result: Dict[str, Any]):
         """Cache location result for consistency"""
-        cache_key = f"{lat:.6f},{lng:.6f}"
+        cache_key = self._coordinate_key(lat, lng)
         self.consistency_cache[cache_key] = {
             'coordinates': (lat, lng),
             'result': result,
-            'timestamp': datetime.now()
+            'timestamp': time.monotonic_ns()
         }
+        # Refreshed entries move to the newest end to keep write order
+        self.consistency_cache.move_to_end(cache_key)
         
-        # Keep cache size manageable
-        if len(self.consistency_cache) > 100:
-            # Remove oldest entries
-            oldest_keys = sorted(
-                self.consistency_cache.keys(),
-                key=lambda k: self.consistency_cache[k]['timestamp']
-            )[:20]
-            for key in oldest_keys:
-                del self.consistency_cache[key]
+        # Keep cache size manageable by dropping the oldest entries
+        while len(self.consistency_cache) > self.consistency_cache_size:
+            self.consistency_cache.popitem(last=False)
     
     def _get_cached_location_result(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Get cached result for this exact location"""
-        cache_key = f"{lat:.6f},{lng:.6f}"
+        cache_key = self._coordinate_key(lat, lng)
         cached_data = self.consistency_cache.get(cache_key)
         
         if cached_data:
             # Check if cache is still valid
-            if datetime.now() - cached_data['timestamp'] <= timedelta(minutes=self.cache_duration_minutes):
+            if time.monotonic_ns() - cached_data['timestamp'] <= self._consistency_ttl_ns:
                 logger.info("Using cached location result")
                 return cached_data['result']
             else:
@@ -167,57 +187,15 @@ class LocationService:
             if cached_result:
                 return cached_result
             
-            # Check database cache with adaptive key
-            cache_key = self._generate_location_cache_key(lat, lng, 1)  # Use 1m for cache key
-            db_cached_result = await self._get_cached_analysis(cache_key)
-            if db_cached_result:
-                self._cache_location_result(lat, lng, db_cached_result)
-                return db_cached_result
-            
-            logger.info(f"Starting adaptive location analysis at ({lat}, {lng})")
-            
-            # Use smart adaptive radius search
-            adaptive_results = await self._search_with_adaptive_radius(lat, lng, max_attempts=4)
-            
-            # Extract the API results
-            google_data = adaptive_results["google"]
-            foursquare_data = adaptive_results["foursquare"]
-            search_metadata = adaptive_results["search_metadata"]
-            
-            # Get historical data using the final radius from adaptive search
-            final_radius = search_metadata["final_radius"]
-            historical_data = await self._get_historical_transaction_data(lat, lng, final_radius)
-            
-            logger.info(f"Adaptive search completed: {search_metadata['total_results']} total results with {final_radius}m final radius")
-            
-            # Combine and analyze data
-            analysis = await self._combine_location_analyses(
-                google_data, foursquare_data, historical_data, lat, lng, final_radius
-            )
-            
-            # Add adaptive search metadata to the analysis
-            analysis["adaptive_search"] = {
-                "strategy": "smart_adaptive_radius",
-                "initial_radius": 1,
-                "final_radius": final_radius,
-                "attempts_made": len(search_metadata["attempts"]),
-                "total_results_found": search_metadata["total_results"],
-                "search_efficiency": search_metadata["total_results"] / len(search_metadata["attempts"]) if search_metadata["attempts"] else 0,
-                "precision_score": adaptive_results["combined_confidence"],
-                "attempt_details": search_metadata["attempts"]
-            }
-            
-            # Boost confidence if we found results with small radius
-            if final_radius <= 5 and search_metadata["total_results"] > 0:
-                if "confidence" in analysis:
-                    analysis["confidence"] = min(0.95, analysis["confidence"] * 1.2)
-                    logger.info(f"Boosted confidence due to small radius precision: {analysis['confidence']:.2f}")
-            
-            # Cache the result in both memory and database
-            self._cache_location_result(lat, lng, analysis)
-            await self._cache_analysis(cache_key, analysis)
-            
-            return analysis
+            # Concurrent requests for the same spot share one analysis
+            inflight_key = self._coordinate_key(lat, lng)
+            fut = self._inflight.get(inflight_key)
+            if fut is None:
+                fut = asyncio.ensure_future(self._analyze_uncached_location(lat, lng))
+                self._inflight[inflight_key] = fut
+                fut.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+            # Shield so one cancelled caller does not cancel the analysis for the others
+            return await asyncio.shield(fut)
             
         except Exception as e:
             logger.error(f"Error in adaptive business district analysis: {e}")
@@ -230,6 +208,60 @@ class LocationService:
             }
             return fallback
     
+    async def _analyze_uncached_location(self, lat: float, lng: float) -> Dict[str, Any]:
+        """Run the database-cached, then full adaptive analysis for a location missing from memory"""
+        # Check database cache with adaptive key
+        cache_key = self._generate_location_cache_key(lat, lng, 1)  # Use 1m for cache key
+        db_cached_result = await self._get_cached_analysis(cache_key)
+        if db_cached_result:
+            self._cache_location_result(lat, lng, db_cached_result)
+            return db_cached_result
+        
+        logger.info(f"Starting adaptive location analysis at ({lat}, {lng})")
+        
+        # Use smart adaptive radius search
+        adaptive_results = await self._search_with_adaptive_radius(lat, lng, max_attempts=4)
+        
+        # Extract the API results
+        google_data = adaptive_results["google"]
+        foursquare_data = adaptive_results["foursquare"]
+        search_metadata = adaptive_results["search_metadata"]
+        
+        # Get historical data using the final radius from adaptive search
+        final_radius = search_metadata["final_radius"]
+        historical_data = await self._get_historical_transaction_data(lat, lng, final_radius)
+        
+        logger.info(f"Adaptive search completed: {search_metadata['total_results']} total results with {final_radius}m final radius")
+        
+        # Combine and analyze data
+        analysis = await self._combine_location_analyses(
+            google_data, foursquare_data, historical_data, lat, lng, final_radius
+        )
+        
+        # Add adaptive search metadata to the analysis
+        analysis["adaptive_search"] = {
+            "strategy": "smart_adaptive_radius",
+            "initial_radius": 1,
+            "final_radius": final_radius,
+            "attempts_made": len(search_metadata["attempts"]),
+            "total_results_found": search_metadata["total_results"],
+            "search_efficiency": search_metadata["total_results"] / len(search_metadata["attempts"]) if search_metadata["attempts"] else 0,
+            "precision_score": adaptive_results["combined_confidence"],
+            "attempt_details": search_metadata["attempts"]
+        }
+        
+        # Boost confidence if we found results with small radius
+        if final_radius <= 5 and search_metadata["total_results"] > 0:
+            if "confidence" in analysis:
+                analysis["confidence"] = min(0.95, analysis["confidence"] * 1.2)
+                logger.info(f"Boosted confidence due to small radius precision: {analysis['confidence']:.2f}")
+        
+        # Cache the result in both memory and database
+        self._cache_location_result(lat, lng, analysis)
+        await self._cache_analysis(cache_key, analysis)
+        
+        return analysis
+    
     async def _get_redundant_api_data(self, lat: float, lng: float, radius: int) -> Dict[str, Any]:
         """
         Get redundant API data with slightly different coordinates for better coverage
@@ -250,29 +282,25 @@ class LocationService:
         # Limit the number of redundant calls
         variations = variations[:self.max_redundant_calls]
         
-        google_results = []
-        foursquare_results = []
-        
         logger.info(f"Making {len(variations)} redundant API calls for better coverage")
         
-        # Run redundant API calls
-        for var_lat, var_lng in variations:
-            try:
-                google_task = self._get_google_places_data(var_lat, var_lng, radius)
-                foursquare_task = self._get_foursquare_data(var_lat, var_lng, radius)
-                
-                google_result, foursquare_result = await asyncio.gather(
-                    google_task, foursquare_task, return_exceptions=True
-                )
-                
-                if not isinstance(google_result, Exception):
-                    google_results.append(google_result)
-                if not isinstance(foursquare_result, Exception):
-                    foursquare_results.append(foursquare_result)
-                    
-            except Exception as e:
-                logger.warning(f"Redundant API call failed for ({var_lat}, {var_lng}): {e}")
-                continue
+        # Run redundant API calls for every variation at once; results alternate google, foursquare
+        results = await asyncio.gather(*(
+            coro
+            for var_lat, var_lng in variations
+            for coro in (
+                self._get_google_places_data(var_lat, var_lng, radius),
+                self._get_foursquare_data(var_lat, var_lng, radius)
+            )
+        ), return_exceptions=True)
+        
+        for (var_lat, var_lng), google_result, foursquare_result in zip(variations, results[0::2], results[1::2]):
+            for result in (google_result, foursquare_result):
+                if isinstance(result, Exception):
+                    logger.warning(f"Redundant API call failed for ({var_lat}, {var_lng}): {result}")
+        
+        google_results = [result for result in results[0::2] if not isinstance(result, Exception)]
+        foursquare_results = [result for result in results[1::2] if not isinstance(result, Exception)]
         
         return {
             'google': google_results,
@@ -331,7 +359,7 @@ class LocationService:
     
     async def _get_google_places_data(self, lat: float, lng: float, radius: int) -> Dict[str, Any]:
         """Get business data from Google Places API"""
-        if not self.google_maps_client:
+        if not self.google_api_key:
             logger.warning("Google Maps client not initialized - no Google Places data available")
             return {"businesses": [], "density_score": 0.0}
         
@@ -339,20 +367,30 @@ class LocationService:
             logger.info(f"Searching Google Places at ({lat}, {lng}) within {radius}m radius")
             
             # Search for nearby places
-            places_result = self.google_maps_client.places_nearby(
-                location=(lat, lng),
-                radius=radius,
-                type=None  # Get all types
-            )
+            places_result = await self._get_google_json(_GOOGLE_NEARBY_URL, {
+                'location': f"{lat},{lng}",
+                'radius': radius
+            })
+            places = places_result.get('results', [])
+            
+            # Fetch detailed geometry for every place at once
+            all_place_details = await asyncio.gather(*(
+                self._get_google_json(_GOOGLE_DETAILS_URL, {
+                    'place_id': place.get('place_id', ''),
+                    'fields': _GOOGLE_DETAIL_FIELDS
+                })
+                for place in places
+            ), return_exceptions=True)
             
             businesses = []
+            specific_mcc_count = 0  # Businesses with a specific (non-5999) MCC mapping
             business_types = {}
             total_rating_sum = 0
             rated_businesses = 0
             
-            logger.info(f"Google Places API returned {len(places_result.get('results', []))} places")
+            logger.info(f"Google Places API returned {len(places)} places")
             
-            for place in places_result.get('results', []):
+            for place, place_details in zip(places, all_place_details):
                 place_types = place.get('types', [])
                 rating = place.get('rating', 0)
                 place_name = place.get('name', 'Unknown')
@@ -367,16 +405,10 @@ class LocationService:
                         (place_location['lat'], place_location['lng'])
                     ).meters
                 
-                # Get detailed place information including geometry
+                # Use the detailed place information including geometry
                 try:
-                    place_details = self.google_maps_client.place(place_id, fields=[
-                        'geometry',
-                        'geometry/viewport',
-                        'geometry/viewport/northeast',
-                        'geometry/viewport/southwest',
-                        'name',
-                        'type'
-                    ])
+                    if isinstance(place_details, Exception):
+                        raise place_details
                     geometry = place_details.get('result', {}).get('geometry', {})
                     viewport = geometry.get('viewport', {})
                     
@@ -426,6 +458,8 @@ class LocationService:
                     'store_dimensions': store_dimensions
                 }
                 businesses.append(business)
+                if mcc_category and mcc_category != '5999':
+                    specific_mcc_count += 1
                 
                 logger.debug(f"Google Places: {place_name} | Types: {place_types} | MCC: {mcc_category}")
                 
@@ -441,8 +475,6 @@ class LocationService:
             
             avg_rating = total_rating_sum / rated_businesses if rated_businesses > 0 else 0
             
-            # Count how many businesses have specific MCC categories
-            specific_mcc_count = sum(1 for b in businesses if b.get('mcc_category') and b.get('mcc_category') != '5999')
             logger.info(f"Google Places: {len(businesses)} total businesses, {specific_mcc_count} with specific MCC mappings")
             
             result = {
@@ -460,6 +492,16 @@ class LocationService:
             logger.error(f"Error fetching Google Places data: {str(e)}")
             return {"businesses": [], "density_score": 0.0}
     
+    async def _get_google_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a Google Places endpoint and return its JSON, raising on an error status"""
+        response = await get_http_client().get(url, params={**params, 'key': self.google_api_key})
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        status = data.get('status')
+        if status not in ('OK', 'ZERO_RESULTS'):
+            raise RuntimeError(f"Google Places API error: {status} {data.get('error_message', '')}".strip())
+        return data
+    
     async def _get_foursquare_data(self, lat: float, lng: float, radius: int) -> Dict[str, Any]:
         """Get venue data from Foursquare API"""
         if not self.foursquare_api_key:
@@ -469,106 +511,107 @@ class LocationService:
         try:
             logger.info(f"Searching Foursquare venues at ({lat}, {lng}) within {radius}m radius")
             
-            async with httpx.AsyncClient() as client:
-                # Foursquare Places API
-                headers = {
-                    'Accept': 'application/json',
-                    'Authorization': settings.FOURSQUARE_API_KEY  # Remove fsq3_ prefix
-                }
-                url = "https://api.foursquare.com/v3/places/search"
-                params = {
-                    "ll": f"{lat},{lng}",
-                    "radius": int(radius),  # Ensure radius is integer
-                    "limit": 50,
-                    "fields": "name,categories,rating,price,location,stats"
-                }
-                
-                response = await client.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                venues = []
-                categories = {}
+            client = get_http_client()
+            # Foursquare Places API
+            headers = {
+                'Accept': 'application/json',
+                'Authorization': settings.FOURSQUARE_API_KEY  # Remove fsq3_ prefix
+            }
+            url = "https://api.foursquare.com/v3/places/search"
+            params = {
+                "ll": f"{lat},{lng}",
+                "radius": int(radius),  # Ensure radius is integer
+                "limit": 50,
+                "fields": "name,categories,rating,price,location,stats"
+            }
+            
+            response = await client.get(url, headers=headers, params=params)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            venues = []
+            specific_mcc_count = 0  # Venues with a specific (non-5999) MCC mapping
+            categories = {}
+            
+            logger.info(f"Foursquare API returned {len(data.get('results', []))} venues")
+            
+            for venue in data.get('results', []):
+                venue_categories = venue.get('categories', [])
+                venue_name = venue.get('name', 'Unknown')
+                venue_location = venue.get('location', {})
                 
-                logger.info(f"Foursquare API returned {len(data.get('results', []))} venues")
+                # Calculate distance from user location
+                distance = 0
+                if venue_location.get('latitude') and venue_location.get('longitude'):
+                    distance = geodesic(
+                        (lat, lng),
+                        (venue_location['latitude'], venue_location['longitude'])
+                    ).meters
                 
-                for venue in data.get('results', []):
-                    venue_categories = venue.get('categories', [])
-                    venue_name = venue.get('name', 'Unknown')
-                    venue_location = venue.get('location', {})
-                    
-                    # Calculate distance from user location
-                    distance = 0
-                    if venue_location.get('latitude') and venue_location.get('longitude'):
-                        distance = geodesic(
-                            (lat, lng),
-                            (venue_location['latitude'], venue_location['longitude'])
+                # Get venue boundaries and dimensions
+                store_dimensions = None
+                bounds = venue.get('bounds', {})
+                if bounds:
+                    ne = bounds.get('ne', {})
+                    sw = bounds.get('sw', {})
+                    if ne and sw:
+                        # Calculate width and length in meters
+                        width = geodesic(
+                            (ne['lat'], ne['lng']),
+                            (ne['lat'], sw['lng'])
                         ).meters
-                    
-                    # Get venue boundaries and dimensions
-                    store_dimensions = None
-                    bounds = venue.get('bounds', {})
-                    if bounds:
-                        ne = bounds.get('ne', {})
-                        sw = bounds.get('sw', {})
-                        if ne and sw:
-                            # Calculate width and length in meters
-                            width = geodesic(
-                                (ne['lat'], ne['lng']),
-                                (ne['lat'], sw['lng'])
-                            ).meters
-                            length = geodesic(
-                                (ne['lat'], ne['lng']),
-                                (sw['lat'], ne['lng'])
-                            ).meters
-                            store_dimensions = {
-                                'width_meters': round(width, 2),
-                                'length_meters': round(length, 2),
-                                'area_sqm': round(width * length, 2),
-                                'bounds': {
-                                    'northeast': ne,
-                                    'southwest': sw
-                                }
+                        length = geodesic(
+                            (ne['lat'], ne['lng']),
+                            (sw['lat'], ne['lng'])
+                        ).meters
+                        store_dimensions = {
+                            'width_meters': round(width, 2),
+                            'length_meters': round(length, 2),
+                            'area_sqm': round(width * length, 2),
+                            'bounds': {
+                                'northeast': ne,
+                                'southwest': sw
                             }
-                    
-                    # Get MCC category for this venue
-                    mcc_category = self._foursquare_categories_to_mcc(venue_categories)
-                    
-                    venue_info = {
-                        'name': venue_name,
-                        'categories': [cat.get('name', '') for cat in venue_categories],
-                        'rating': venue.get('rating', 0),
-                        'price': venue.get('price', 0),
-                        'location': {
-                            **venue_location,
-                            'distance': round(distance, 2)
-                        },
-                        'stats': venue.get('stats', {}),
-                        'mcc_category': mcc_category,
-                        'store_dimensions': store_dimensions
-                    }
-                    venues.append(venue_info)
-                    
-                    category_names = [cat.get('name', '') for cat in venue_categories]
-                    logger.debug(f"Foursquare: {venue_name} | Categories: {category_names} | MCC: {mcc_category}")
-                    
-                    # Count categories
-                    for cat in venue_categories:
-                        cat_name = cat.get('name', '')
-                        categories[cat_name] = categories.get(cat_name, 0) + 1
+                        }
                 
-                # Count how many venues have specific MCC categories
-                specific_mcc_count = sum(1 for v in venues if v.get('mcc_category') and v.get('mcc_category') != '5999')
-                logger.info(f"Foursquare: {len(venues)} total venues, {specific_mcc_count} with specific MCC mappings")
+                # Get MCC category for this venue
+                mcc_category = self._foursquare_categories_to_mcc(venue_categories)
                 
-                return {
-                    'venues': venues,
-                    'venue_count': len(venues),
-                    'categories': categories,
-                    'density_score': min(len(venues) / 40.0, 1.0),  # Normalize to 0-1
-                    'commercial_indicators': self._analyze_foursquare_commercial_indicators(categories)
+                venue_info = {
+                    'name': venue_name,
+                    'categories': [cat.get('name', '') for cat in venue_categories],
+                    'rating': venue.get('rating', 0),
+                    'price': venue.get('price', 0),
+                    'location': {
+                        **venue_location,
+                        'distance': round(distance, 2)
+                    },
+                    'stats': venue.get('stats', {}),
+                    'mcc_category': mcc_category,
+                    'store_dimensions': store_dimensions
                 }
+                venues.append(venue_info)
+                if mcc_category and mcc_category != '5999':
+                    specific_mcc_count += 1
+                
+                category_names = [cat.get('name', '') for cat in venue_categories]
+                logger.debug(f"Foursquare: {venue_name} | Categories: {category_names} | MCC: {mcc_category}")
                 
+                # Count categories
+                for cat in venue_categories:
+                    cat_name = cat.get('name', '')
+                    categories[cat_name] = categories.get(cat_name, 0) + 1
+            
+            logger.info(f"Foursquare: {len(venues)} total venues, {specific_mcc_count} with specific MCC mappings")
+            
+            return {
+                'venues': venues,
+                'venue_count': len(venues),
+                'categories': categories,
+                'density_score': min(len(venues) / 40.0, 1.0),  # Normalize to 0-1
+                'commercial_indicators': self._analyze_foursquare_commercial_indicators(categories)
+            }
+            
         except Exception as e:
             logger.error(f"Error fetching Foursquare data: {str(e)}")
             return {"venues": [], "density_score": 0.0}
@@ -586,9 +629,9 @@ class LocationService:
             # Try to query historical data from our database
             try:
                 # Supabase operations are synchronous
-                result = self.supabase.client.table('transaction_history').select(
+                result = await run_query(self.supabase.client.table('transaction_history').select(
                     'mcc, confidence, method, created_at, location_hash'
-                ).eq('location_hash', location_hash).execute()
+                ).eq('location_hash', location_hash))
                 
                 transactions = result.data if result.data else []
                 
@@ -679,7 +722,7 @@ class LocationService:
             'predicted_mcc': predicted_mcc,
             'location_precision': self._calculate_location_precision(lat, lng),
             'confidence_factors': {
-                'google_api_available': bool(self.google_maps_client),
+                'google_api_available': bool(self.google_api_key),
                 'foursquare_api_available': bool(self.foursquare_api_key),
                 'historical_data_available': historical_data.get('total_transactions', 0) > 0,
                 'combined_business_count': google_data.get('business_count', 0) + foursquare_data.get('venue_count', 0)
@@ -1160,11 +1203,11 @@ class LocationService:
             if self.supabase and self.supabase.is_available:
                 try:
                     # Supabase operations are synchronous
-                    result = self.supabase.client.table('location_cache').select('*').eq('cache_key', cache_key).execute()
+                    result = await run_query(self.supabase.client.table('location_cache').select('*').eq('cache_key', cache_key))
                     if result.data:
                         cache_entry = result.data[0]
-                        cached_at = datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00'))
-                        if datetime.now() - cached_at < self.cache_duration:
+                        cached_at = datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00')).timestamp()
+                        if time.time() - cached_at < self.cache_duration.total_seconds():
                             return json.loads(cache_entry['analysis_data'])
                 except Exception:
                     # Silently handle database table not found - this is expected in API-only mode
@@ -1180,11 +1223,11 @@ class LocationService:
             if self.supabase and self.supabase.is_available:
                 try:
                     # Supabase operations are synchronous
-                    self.supabase.client.table('location_cache').upsert({
+                    await run_query(self.supabase.client.table('location_cache').upsert({
                         'cache_key': cache_key,
                         'analysis_data': json.dumps(analysis),
                         'created_at': datetime.now().isoformat()
-                    }).execute()
+                    }))
                 except Exception:
                     # Silently handle database table not found - this is expected in API-only mode
                     pass
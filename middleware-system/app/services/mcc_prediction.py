@@ -7,6 +7,7 @@ import asyncio
 import logging
 import json
 import hashlib
+import heapq
 from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 from geopy.distance import geodesic
@@ -613,14 +614,14 @@ class MCCPredictionEngine:
     
     def _hash_wifi_fingerprint(self, wifi_networks: List[WiFiData]) -> str:
         """Create a hash for WiFi fingerprint"""
-        sorted_networks = sorted(wifi_networks, key=lambda x: x.signal_strength, reverse=True)[:5]
+        sorted_networks = heapq.nlargest(5, wifi_networks, key=lambda x: x.signal_strength)
         fingerprint_data = [f"{net.ssid}:{net.bssid}" for net in sorted_networks if net.ssid]
         fingerprint_string = "|".join(fingerprint_data)
         return hashlib.md5(fingerprint_string.encode()).hexdigest()[:12]
     
     def _hash_ble_fingerprint(self, ble_devices: List[BLEData]) -> str:
         """Create a hash for BLE fingerprint"""
-        sorted_devices = sorted(ble_devices, key=lambda x: x.rssi, reverse=True)[:5]
+        sorted_devices = heapq.nlargest(5, ble_devices, key=lambda x: x.rssi)
         fingerprint_data = [f"{device.device_type}:{device.device_name}" for device in sorted_devices]
         fingerprint_string = "|".join(fingerprint_data)
         return hashlib.md5(fingerprint_string.encode()).hexdigest()[:12]
@@ -14,7 +14,7 @@ from collections import defaultdict, Counter
 import json
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..database.supabase_client import get_supabase_client, run_query
 
 logger = logging.getLogger(__name__)
 
@@ -206,9 +206,9 @@ class POSTerminalService:
                 return
             
             # Load learned mappings from database
-            result = self.supabase.client.table('pos_terminal_mappings').select(
+            result = await run_query(self.supabase.client.table('pos_terminal_mappings').select(
                 'ble_signature, mcc, confidence, confirmation_count, first_seen'
-            ).execute()
+            ))
             
             if result.data:
                 for mapping in result.data:
@@ -690,9 +690,9 @@ class POSTerminalService:
                 return
             
             # Check if mapping already exists
-            existing = self.supabase.client.table('pos_terminal_mappings').select('*').eq(
+            existing = await run_query(self.supabase.client.table('pos_terminal_mappings').select('*').eq(
                 'ble_signature', signature
-            ).execute()
+            ))
             
             if existing.data:
                 # Update existing mapping
@@ -700,17 +700,17 @@ class POSTerminalService:
                 
                 if current['mcc'] == mcc:
                     # Confirmation - increase count
-                    self.supabase.client.table('pos_terminal_mappings').update({
+                    await run_query(self.supabase.client.table('pos_terminal_mappings').update({
                         'confirmation_count': current['confirmation_count'] + 1,
                         'confidence': min(0.95, current['confidence'] + 0.1),
                         'last_confirmed': datetime.now().isoformat()
-                    }).eq('ble_signature', signature).execute()
+                    }).eq('ble_signature', signature))
                 else:
                     # Conflict - handle disagreement
                     logger.warning(f"MCC conflict for terminal {signature}: existing={current['mcc']}, new={mcc}")
             else:
                 # Create new mapping
-                self.supabase.client.table('pos_terminal_mappings').insert({
+                await run_query(self.supabase.client.table('pos_terminal_mappings').insert({
                     'ble_signature': signature,
                     'mcc': mcc,
                     'confidence': 1.0,
@@ -720,7 +720,7 @@ class POSTerminalService:
                     'location_hash': self._hash_location(location_data) if location_data else None,
                     'first_seen': datetime.now().isoformat(),
                     'last_confirmed': datetime.now().isoformat()
-                }).execute()
+                }))
             
             # Update memory cache
             if signature in self.learned_terminal_mappings:
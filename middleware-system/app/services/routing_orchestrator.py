@@ -5,33 +5,106 @@ Enhanced with core GPS-based MCC prediction
 """
 
 import asyncio
+import functools
 import hashlib
+import heapq
 import logging
+import time
 from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from decimal import Decimal
-import uuid
 import random
+import secrets
 import decimal
 
 from app.database.connection_manager import connection_manager
 from app.database.models import TransactionFeedback, MCCPrediction, CardPerformance
 from app.models.schemas import APIResponse
-from app.utils.mcc_categories import get_all_mcc_categories, get_mcc_for_category
+from app.core.clock import now_iso
+from app.utils.mcc_categories import get_category_for_mcc, get_mcc_for_category
 
 # Import core services only
 from .location_service import LocationService
 
 logger = logging.getLogger(__name__)
 
+# Broad reward categories for MCCs with dedicated card rates
+_MCC_REWARD_CATEGORIES = {
+    "5411": "grocery", "5412": "grocery",
+    "5541": "gas", "5542": "gas",
+    "5812": "dining", "5813": "dining", "5814": "dining",
+}
+
+
+# Simulated merchant scenarios as (mcc, confidence, terminal prefix, name)
+_MORNING_SCENARIOS = (
+    ("5812", 0.85, "CAFE", "Coffee Shop"),
+    ("5411", 0.75, "GROC", "Grocery Store"),
+    ("5541", 0.70, "GAS", "Gas Station"),
+    ("5814", 0.65, "FAST", "Fast Food"),
+)
+_LUNCH_SCENARIOS = (
+    ("5812", 0.90, "REST", "Restaurant"),
+    ("5814", 0.85, "FAST", "Fast Food"),
+    ("5411", 0.60, "GROC", "Grocery Store"),
+    ("5812", 0.75, "CAFE", "Cafe"),
+)
+_DINNER_SCENARIOS = (
+    ("5812", 0.88, "REST", "Restaurant"),
+    ("5411", 0.80, "GROC", "Grocery Store"),
+    ("5814", 0.70, "FAST", "Fast Food"),
+    ("5921", 0.65, "LIQR", "Liquor Store"),
+)
+_WEEKEND_SCENARIOS = (
+    ("5999", 0.75, "SHOP", "Retail Store"),
+    ("5812", 0.80, "REST", "Restaurant"),
+    ("5732", 0.70, "ELEC", "Electronics Store"),
+    ("5411", 0.75, "GROC", "Grocery Store"),
+    ("5944", 0.65, "JEWL", "Jewelry Store"),
+)
+_BUSINESS_SCENARIOS = (
+    ("5999", 0.70, "SHOP", "Retail Store"),
+    ("5912", 0.75, "PHAR", "Pharmacy"),
+    ("5541", 0.80, "GAS", "Gas Station"),
+    ("5411", 0.70, "GROC", "Grocery Store"),
+    ("5732", 0.65, "ELEC", "Electronics Store"),
+)
+
+
+def _scenarios_for_hour(hour: int, is_weekend: bool) -> Tuple[Tuple[str, float, str, str], ...]:
+    """Merchant scenarios for an hour: meal windows first, then weekend, then business hours"""
+    if 6 <= hour <= 9:
+        return _MORNING_SCENARIOS
+    if 11 <= hour <= 14:
+        return _LUNCH_SCENARIOS
+    if 17 <= hour <= 21:
+        return _DINNER_SCENARIOS
+    return _WEEKEND_SCENARIOS if is_weekend else _BUSINESS_SCENARIOS
+
+
+# Indexed as [is_weekend][hour]
+_SCENARIOS_BY_HOUR = tuple(
+    tuple(_scenarios_for_hour(hour, is_weekend) for hour in range(24))
+    for is_weekend in (False, True)
+)
+
+
+@functools.lru_cache(maxsize=8192)
+def _location_digest(lat_rounded: float, lng_rounded: float) -> str:
+    """MD5-based location key for already-rounded coordinates"""
+    return hashlib.md5(f"{lat_rounded},{lng_rounded}".encode()).hexdigest()[:12]
+
 
 class RoutingOrchestrator:
     """Main orchestrator for payment routing decisions with core GPS-based MCC prediction"""
     
     def __init__(self):
         self.mcc_cache = {}
-        self.location_cache = {}
-        self.terminal_cache = {}
+        # Feedback-learned MCCs as key -> (mcc, confidence, monotonic_ns), least recently updated first
+        self.location_cache = OrderedDict()
+        self.terminal_cache = OrderedDict()
+        self.feedback_cache_size = 50_000
         
         # Core services only
         self.location_service = None
@@ -44,6 +117,9 @@ class RoutingOrchestrator:
         # System state
         self.is_running = False
         self.background_tasks = []
+        self._pending_writes = set()  # Fire-and-forget learning writes still in flight
+        self._analytics_snapshots = {}  # days -> (monotonic time, analytics), dropped when new feedback arrives
+        self.analytics_snapshot_seconds = 60  # Bounds staleness from feedback stored by other workers
         
     async def initialize(self):
         """Initialize the routing orchestrator with core services only"""
@@ -84,6 +160,9 @@ class RoutingOrchestrator:
         """Cleanup resources and shutdown"""
         logger.info("Cleaning up Routing Orchestrator...")
         self.is_running = False
+        if self._pending_writes:
+            # Let in-flight learning writes land before shutdown
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
         logger.info("Routing Orchestrator cleanup complete")
         
     async def process_payment_request(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -93,7 +172,9 @@ class RoutingOrchestrator:
         """
         try:
             # Extract session and context information
-            session_id = payment_data.get("session_id", self._generate_session_id())
+            session_id = payment_data.get("session_id")
+            if session_id is None:
+                session_id = self._generate_session_id()
             user_id = payment_data.get("user_id", "anonymous")
             amount = Decimal(str(payment_data.get("amount", 0)))
             
@@ -111,8 +192,8 @@ class RoutingOrchestrator:
                 payment_data
             )
             
-            # Store prediction for learning
-            await self._store_prediction_data(mcc_prediction, session_id)
+            # Store prediction for learning without holding up the routing response
+            self._schedule_write(self._store_prediction_data(mcc_prediction, session_id))
             
             # Note: Transaction storage removed since location service doesn't have store_transaction_data method
             
@@ -127,7 +208,7 @@ class RoutingOrchestrator:
                 "routing_reason": card_selection.get("reason", "Optimal rewards"),
                 "estimated_rewards": card_selection.get("estimated_rewards", 0),
                 "analysis_details": mcc_prediction.get("analysis_details", {}),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
             
             logger.info(f"Payment routing completed for session {session_id} with core prediction")
@@ -138,7 +219,7 @@ class RoutingOrchestrator:
             return {
                 "error": "Processing failed",
                 "message": str(e),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
     
     async def _predict_mcc_core(self, payment_data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
@@ -377,26 +458,20 @@ class RoutingOrchestrator:
                 precise_hash += f"_floor_{floor}"
             
             # Query database for exact matches
-            history = await connection_manager.get_location_mcc_history(precise_hash, 5)
-            if history and len(history) >= 2:  # Need multiple confirmations for high confidence
-                # Use most common MCC for this precise location
-                mcc_counts = {}
-                for record in history:
-                    mcc = record.get("actual_mcc") or record.get("predicted_mcc")
-                    if mcc:
-                        mcc_counts[mcc] = mcc_counts.get(mcc, 0) + 1
+            distribution = await connection_manager.get_location_mcc_distribution(precise_hash, 5)
+            total = sum(row["cnt"] for row in distribution)
+            if total >= 2:  # Need multiple confirmations for high confidence
+                # Distribution is ordered by count, so the first row is the most common MCC
+                top = distribution[0]
+                confidence = min(0.95, (top["cnt"] / total) * 1.1)  # Boost for precision
                 
-                if mcc_counts:
-                    most_common_mcc = max(mcc_counts, key=mcc_counts.get)
-                    confidence = min(0.95, (mcc_counts[most_common_mcc] / len(history)) * 1.1)  # Boost for precision
-                    
-                    return {
-                        "mcc": most_common_mcc,
-                        "confidence": confidence,
-                        "method": "precise_location",
-                        "location_type": "exact_match",
-                        "precision_level": "sub_meter"
-                    }
+                return {
+                    "mcc": top["mcc"],
+                    "confidence": confidence,
+                    "method": "precise_location",
+                    "location_type": "exact_match",
+                    "precision_level": "sub_meter"
+                }
         except Exception as e:
             logger.error(f"Error in precise location check: {str(e)}")
         
@@ -406,7 +481,7 @@ class RoutingOrchestrator:
         """Check for indoor venue mapping (malls, plazas, airports, shopping centers)"""
         try:
             # Check against known indoor venues database
-            venue_info = await self._get_venue_info(lat, lng)
+            venue_info = self._get_venue_info(lat, lng)
             
             if venue_info:
                 venue_type = venue_info.get("type")  # mall, plaza, airport, hospital, etc.
@@ -423,7 +498,7 @@ class RoutingOrchestrator:
                 ble_context = location_data.get("ble_beacons", [])
                 
                 # Query venue-specific MCC patterns
-                venue_prediction = await self._predict_venue_mcc(venue_info, floor, wifi_context, ble_context)
+                venue_prediction = self._predict_venue_mcc(venue_info, floor, wifi_context, ble_context)
                 
                 if venue_prediction:
                     venue_prediction.update({
@@ -497,27 +572,20 @@ class RoutingOrchestrator:
             # Lower precision hash (3 decimal places = ~100m precision)
             area_hash = self._hash_location(lat, lng, precision=3)
             
-            history = await connection_manager.get_location_mcc_history(area_hash, 20)
-            if history:
-                # Analyze MCC patterns in this area
-                mcc_patterns = {}
-                for record in history:
-                    mcc = record.get("actual_mcc") or record.get("predicted_mcc")
-                    if mcc:
-                        mcc_patterns[mcc] = mcc_patterns.get(mcc, 0) + 1
+            distribution = await connection_manager.get_location_mcc_distribution(area_hash, 20)
+            if distribution:
+                # Use most common MCC in the area (distribution is ordered by count)
+                top = distribution[0]
+                total = sum(row["cnt"] for row in distribution)
+                confidence = min(0.7, (top["cnt"] / total) * 0.9)
                 
-                if mcc_patterns:
-                    # Use most common MCC in the area
-                    most_common_mcc = max(mcc_patterns, key=mcc_patterns.get)
-                    confidence = min(0.7, (mcc_patterns[most_common_mcc] / len(history)) * 0.9)
-                    
-                    return {
-                        "mcc": most_common_mcc,
-                        "confidence": confidence,
-                        "method": "area_pattern",
-                        "location_type": "neighborhood",
-                        "precision_level": "area"
-                    }
+                return {
+                    "mcc": top["mcc"],
+                    "confidence": confidence,
+                    "method": "area_pattern",
+                    "location_type": "neighborhood",
+                    "precision_level": "area"
+                }
         except Exception as e:
             logger.error(f"Error in area prediction: {str(e)}")
         
@@ -533,7 +601,7 @@ class RoutingOrchestrator:
             # For now, return a basic implementation
             
             # Example: Detect if this is a commercial vs residential area
-            business_indicators = await self._analyze_business_district(lat, lng)
+            business_indicators = self._analyze_business_district(lat, lng)
             
             if business_indicators and business_indicators.get("commercial_score", 0) > 0.6:
                 # Commercial area - likely retail or office
@@ -549,7 +617,7 @@ class RoutingOrchestrator:
         
         return None
     
-    async def _get_venue_info(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+    def _get_venue_info(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Get venue information for indoor mapping"""
         # This would query a venues database with known malls, plazas, etc.
         # For now, return mock data for demonstration
@@ -581,8 +649,8 @@ class RoutingOrchestrator:
         
         return None
     
-    async def _predict_venue_mcc(self, venue_info: Dict[str, Any], floor: Optional[int], 
-                                wifi_context: List[Dict], ble_context: List[Dict]) -> Optional[Dict[str, Any]]:
+    def _predict_venue_mcc(self, venue_info: Dict[str, Any], floor: Optional[int], 
+                          wifi_context: List[Dict], ble_context: List[Dict]) -> Optional[Dict[str, Any]]:
         """Predict MCC within a specific venue using floor and context data"""
         try:
             venue_id = venue_info["venue_id"]
@@ -622,7 +690,7 @@ class RoutingOrchestrator:
         
         return None
     
-    async def _analyze_business_district(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+    def _analyze_business_district(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Analyze if location is in a business/commercial district"""
         # This would use external APIs or databases to determine business density
         # For now, return mock analysis
@@ -719,15 +787,16 @@ class RoutingOrchestrator:
                 "estimated_rewards": 0
             }
         
+        # Fetch historical performance for all cards at once rather than one round trip per card
+        all_performance_stats = await asyncio.gather(*(
+            connection_manager.get_card_performance_stats(card.get("card_id"), 30)
+            for card in available_cards
+        ))
+        
         # Calculate rewards for each card based on MCC
         card_scores = []
         
-        for card in available_cards:
-            card_id = card.get("card_id")
-            
-            # Get historical performance for this card
-            performance_stats = await connection_manager.get_card_performance_stats(card_id, 30)
-            
+        for card, performance_stats in zip(available_cards, all_performance_stats):
             # Calculate rewards estimate
             rewards_estimate = self._calculate_rewards_estimate(card, predicted_mcc, amount)
             
@@ -789,30 +858,25 @@ class RoutingOrchestrator:
     
     def _mcc_to_category(self, mcc: str) -> str:
         """Convert MCC to broad category"""
-        # Simple mapping - could be expanded
-        if mcc in ["5411", "5412"]:
-            return "grocery"
-        elif mcc in ["5541", "5542"]:
-            return "gas"
-        elif mcc in ["5812", "5813", "5814"]:
-            return "dining"
-        elif mcc.startswith("5"):
-            return "retail"
-        else:
-            return "other"
+        category = _MCC_REWARD_CATEGORIES.get(mcc)
+        if category:
+            return category
+        return "retail" if mcc.startswith("5") else "other"
 
     def _mcc_to_category_name(self, mcc: str) -> str:
         """Convert MCC to descriptive category name using centralized utility"""
-        # Use centralized MCC categories
-        all_categories = get_all_mcc_categories()
-        
-        # Find the category name for this MCC
-        for category, mcc_code in all_categories.items():
-            if mcc_code == mcc:
-                return category.replace('_', ' ').title()
+        category = get_category_for_mcc(mcc)
+        if category:
+            return category.replace('_', ' ').title()
         
         return f"Unknown Merchant (MCC {mcc})"
 
+    def _schedule_write(self, coro):
+        """Run a learning write in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+    
     async def _store_prediction_data(self, prediction: Dict[str, Any], session_id: str):
         """Store prediction data for learning"""
         try:
@@ -835,19 +899,22 @@ class RoutingOrchestrator:
             success = await connection_manager.store_transaction_feedback(feedback_data)
             
             if success:
+                # New feedback invalidates analytics snapshots
+                self._analytics_snapshots.clear()
+                
                 # Update internal caches based on feedback
-                await self._update_caches_from_feedback(feedback_data)
+                self._update_caches_from_feedback(feedback_data)
                 
                 return {
                     "status": "success",
                     "message": "Feedback processed successfully",
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": now_iso()
                 }
             else:
                 return {
                     "status": "error",
                     "message": "Failed to store feedback",
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": now_iso()
                 }
                 
         except Exception as e:
@@ -855,10 +922,10 @@ class RoutingOrchestrator:
             return {
                 "status": "error",
                 "message": str(e),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
     
-    async def _update_caches_from_feedback(self, feedback_data: Dict[str, Any]):
+    def _update_caches_from_feedback(self, feedback_data: Dict[str, Any]):
         """Update internal caches based on transaction feedback"""
         try:
             actual_mcc = feedback_data.get("actual_mcc")
@@ -867,23 +934,22 @@ class RoutingOrchestrator:
             
             if actual_mcc and terminal_id:
                 # Update terminal cache
-                self.terminal_cache[terminal_id] = {
-                    "mcc": actual_mcc,
-                    "confidence": 1.0,
-                    "last_updated": datetime.now()
-                }
+                self._remember_feedback(self.terminal_cache, terminal_id, actual_mcc)
             
             if actual_mcc and location_hash:
                 # Update location cache
-                self.location_cache[location_hash] = {
-                    "mcc": actual_mcc,
-                    "confidence": 1.0,
-                    "last_updated": datetime.now()
-                }
+                self._remember_feedback(self.location_cache, location_hash, actual_mcc)
                 
         except Exception as e:
             logger.error(f"Error updating caches: {str(e)}")
     
+    def _remember_feedback(self, cache: OrderedDict, key: str, mcc: str):
+        """Record a confirmed MCC in a bounded LRU cache"""
+        cache[key] = (mcc, 1.0, time.monotonic_ns())
+        cache.move_to_end(key)
+        while len(cache) > self.feedback_cache_size:
+            cache.popitem(last=False)
+    
     def _create_user_feature_vector(self, user_id: str) -> List[float]:
         """Create a user feature vector from historical data"""
         try:
@@ -896,28 +962,26 @@ class RoutingOrchestrator:
 
     def _generate_session_id(self) -> str:
         """Generate a unique session ID"""
-        return f"session_{uuid.uuid4().hex[:12]}"
+        return f"session_{secrets.token_hex(6)}"
     
     def _hash_location(self, lat: float, lng: float, precision: int = 4) -> str:
         """Create a hash for location coordinates with specified precision"""
-        # Round coordinates to reduce precision for caching
-        lat_rounded = round(lat, precision)
-        lng_rounded = round(lng, precision)
-        location_string = f"{lat_rounded},{lng_rounded}"
-        return hashlib.md5(location_string.encode()).hexdigest()[:12]
+        # Round coordinates to reduce precision for caching; devices revisit the
+        # same places, so the string build and MD5 are memoized on the rounded pair
+        return _location_digest(round(lat, precision), round(lng, precision))
     
     def _hash_wifi_fingerprint(self, wifi_data: List[Dict[str, Any]]) -> str:
         """Create a hash for WiFi fingerprint"""
-        # Sort by signal strength and take top networks
-        sorted_networks = sorted(wifi_data, key=lambda x: x.get("signal_strength", 0), reverse=True)[:5]
+        # Take the strongest networks (partial selection, no full sort)
+        sorted_networks = heapq.nlargest(5, wifi_data, key=lambda x: x.get("signal_strength", 0))
         fingerprint_data = [f"{net.get('ssid', '')}:{net.get('bssid', '')}" for net in sorted_networks]
         fingerprint_string = "|".join(fingerprint_data)
         return hashlib.md5(fingerprint_string.encode()).hexdigest()[:12]
     
     def _hash_ble_fingerprint(self, ble_data: List[Dict[str, Any]]) -> str:
         """Create a hash for BLE fingerprint"""
-        # Sort by signal strength and take top beacons
-        sorted_beacons = sorted(ble_data, key=lambda x: x.get("rssi", -100), reverse=True)[:5]
+        # Take the strongest beacons (partial selection, no full sort)
+        sorted_beacons = heapq.nlargest(5, ble_data, key=lambda x: x.get("rssi", -100))
         fingerprint_data = [f"{beacon.get('uuid', '')}:{beacon.get('major', '')}:{beacon.get('minor', '')}" 
                           for beacon in sorted_beacons]
         fingerprint_string = "|".join(fingerprint_data)
@@ -925,22 +989,27 @@ class RoutingOrchestrator:
     
     async def get_analytics(self, days: int = 7) -> Dict[str, Any]:
         """Get routing analytics"""
+        snapshot = self._analytics_snapshots.get(days)
+        if snapshot and time.monotonic() - snapshot[0] < self.analytics_snapshot_seconds:
+            return snapshot[1]
+        
         try:
             analytics = await connection_manager.get_system_analytics(days)
             if analytics:
+                self._analytics_snapshots[days] = (time.monotonic(), analytics)
                 return analytics
             else:
                 return {
                     "message": "No analytics data available",
                     "period_days": days,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": now_iso()
                 }
         except Exception as e:
             logger.error(f"Error retrieving analytics: {str(e)}")
             return {
                 "error": "Failed to retrieve analytics",
                 "message": str(e),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
 
     async def health_check(self) -> Dict[str, Any]:
@@ -951,7 +1020,7 @@ class RoutingOrchestrator:
                 "data": {
                     "status": "healthy" if self.is_running else "stopped",
                     "version": "1.0.0",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": now_iso(),
                     "components": {
                         "routing_orchestrator": "healthy" if self.is_running else "stopped",
                         "location_service": "healthy" if self.location_service else "disabled",
@@ -1121,7 +1190,7 @@ class RoutingOrchestrator:
                 
             else:
                 # Generate realistic context for testing when no real data is provided
-                payment_context = await self._generate_realistic_payment_context(session)
+                payment_context = self._generate_realistic_payment_context(session)
                 logger.info(f"Generated test payment context for session {session_id}")
             
             # Perform MCC prediction with the payment context
@@ -1422,55 +1491,22 @@ class RoutingOrchestrator:
                 "message": "Failed to get performance metrics"
             }
 
-    async def _generate_realistic_payment_context(self, session: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_realistic_payment_context(self, session: Dict[str, Any]) -> Dict[str, Any]:
         """Generate realistic payment context for MCC prediction"""
         
         # Realistic merchant scenarios based on time, location, and context
-        current_hour = datetime.now().hour
-        day_of_week = datetime.now().weekday()  # 0=Monday, 6=Sunday
-        
-        # Time-based merchant probabilities
-        if 6 <= current_hour <= 9:  # Morning
-            merchant_scenarios = [
-                {"mcc": "5812", "confidence": 0.85, "terminal_id": f"CAFE_{random.randint(1000, 9999)}", "name": "Coffee Shop"},
-                {"mcc": "5411", "confidence": 0.75, "terminal_id": f"GROC_{random.randint(1000, 9999)}", "name": "Grocery Store"},
-                {"mcc": "5541", "confidence": 0.70, "terminal_id": f"GAS_{random.randint(1000, 9999)}", "name": "Gas Station"},
-                {"mcc": "5814", "confidence": 0.65, "terminal_id": f"FAST_{random.randint(1000, 9999)}", "name": "Fast Food"}
-            ]
-        elif 11 <= current_hour <= 14:  # Lunch
-            merchant_scenarios = [
-                {"mcc": "5812", "confidence": 0.90, "terminal_id": f"REST_{random.randint(1000, 9999)}", "name": "Restaurant"},
-                {"mcc": "5814", "confidence": 0.85, "terminal_id": f"FAST_{random.randint(1000, 9999)}", "name": "Fast Food"},
-                {"mcc": "5411", "confidence": 0.60, "terminal_id": f"GROC_{random.randint(1000, 9999)}", "name": "Grocery Store"},
-                {"mcc": "5812", "confidence": 0.75, "terminal_id": f"CAFE_{random.randint(1000, 9999)}", "name": "Cafe"}
-            ]
-        elif 17 <= current_hour <= 21:  # Dinner
-            merchant_scenarios = [
-                {"mcc": "5812", "confidence": 0.88, "terminal_id": f"REST_{random.randint(1000, 9999)}", "name": "Restaurant"},
-                {"mcc": "5411", "confidence": 0.80, "terminal_id": f"GROC_{random.randint(1000, 9999)}", "name": "Grocery Store"},
-                {"mcc": "5814", "confidence": 0.70, "terminal_id": f"FAST_{random.randint(1000, 9999)}", "name": "Fast Food"},
-                {"mcc": "5921", "confidence": 0.65, "terminal_id": f"LIQR_{random.randint(1000, 9999)}", "name": "Liquor Store"}
-            ]
-        elif day_of_week >= 5:  # Weekend
-            merchant_scenarios = [
-                {"mcc": "5999", "confidence": 0.75, "terminal_id": f"SHOP_{random.randint(1000, 9999)}", "name": "Retail Store"},
-                {"mcc": "5812", "confidence": 0.80, "terminal_id": f"REST_{random.randint(1000, 9999)}", "name": "Restaurant"},
-                {"mcc": "5732", "confidence": 0.70, "terminal_id": f"ELEC_{random.randint(1000, 9999)}", "name": "Electronics Store"},
-                {"mcc": "5411", "confidence": 0.75, "terminal_id": f"GROC_{random.randint(1000, 9999)}", "name": "Grocery Store"},
-                {"mcc": "5944", "confidence": 0.65, "terminal_id": f"JEWL_{random.randint(1000, 9999)}", "name": "Jewelry Store"}
-            ]
-        else:  # Regular business hours
-            merchant_scenarios = [
-                {"mcc": "5999", "confidence": 0.70, "terminal_id": f"SHOP_{random.randint(1000, 9999)}", "name": "Retail Store"},
-                {"mcc": "5912", "confidence": 0.75, "terminal_id": f"PHAR_{random.randint(1000, 9999)}", "name": "Pharmacy"},
-                {"mcc": "5541", "confidence": 0.80, "terminal_id": f"GAS_{random.randint(1000, 9999)}", "name": "Gas Station"},
-                {"mcc": "5411", "confidence": 0.70, "terminal_id": f"GROC_{random.randint(1000, 9999)}", "name": "Grocery Store"},
-                {"mcc": "5732", "confidence": 0.65, "terminal_id": f"ELEC_{random.randint(1000, 9999)}", "name": "Electronics Store"}
-            ]
+        now = datetime.now()
+        merchant_scenarios = _SCENARIOS_BY_HOUR[now.weekday() >= 5][now.hour]
         
         # Select a merchant scenario based on session ID for consistency
         session_hash = int(hashlib.md5(session["session_id"].encode()).hexdigest()[:8], 16)
-        selected_scenario = merchant_scenarios[session_hash % len(merchant_scenarios)]
+        mcc, confidence, terminal_prefix, name = merchant_scenarios[session_hash % len(merchant_scenarios)]
+        selected_scenario = {
+            "mcc": mcc,
+            "confidence": confidence,
+            "terminal_id": f"{terminal_prefix}_{random.randint(1000, 9999)}",
+            "name": name
+        }
         
         # Check if session has real-time location data from phone
         real_location = session.get("real_time_location")
@@ -1530,8 +1566,8 @@ class RoutingOrchestrator:
             "user_id": session["user_id"],
             "context_info": {
                 "merchant_name": selected_scenario["name"],
-                "time_of_day": current_hour,
-                "day_of_week": day_of_week,
+                "time_of_day": now.hour,
+                "day_of_week": now.weekday(),
                 "expected_mcc": selected_scenario["mcc"],  # This simulates what we'd actually detect
                 "simulation_mode": not bool(real_location),  # False if real GPS data is used
                 "location_source": location_data.get("source", "unknown")
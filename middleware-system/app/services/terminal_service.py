@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 import json
+import time
 import hashlib
 import re
 from datetime import datetime, timedelta
@@ -17,7 +18,7 @@ import numpy as np
 from geopy.distance import geodesic
 
 from ..core.config import settings
-from ..database.supabase_client import get_supabase_client
+from ..database.supabase_client import get_supabase_client, run_query
 
 logger = logging.getLogger(__name__)
 
@@ -39,10 +40,9 @@ class TerminalService:
             
             # Test database connectivity if available
             if self.supabase.is_available:
-                # Supabase operations are synchronous, no await needed
-                self.supabase.client.table('terminal_registry').select('*').limit(1).execute()
-                self.supabase.client.table('terminal_transactions').select('*').limit(1).execute()
-                self.supabase.client.table('merchant_profiles').select('*').limit(1).execute()
+                await run_query(self.supabase.client.table('terminal_registry').select('*').limit(1))
+                await run_query(self.supabase.client.table('terminal_transactions').select('*').limit(1))
+                await run_query(self.supabase.client.table('merchant_profiles').select('*').limit(1))
                 logger.info("Terminal service database connectivity verified")
             else:
                 logger.warning("Terminal service: Supabase not available, using fallback")
@@ -56,9 +56,9 @@ class TerminalService:
         try:
             if self.supabase and self.supabase.is_available:
                 # Test key tables
-                self.supabase.client.table('terminal_registry').select('*').limit(1).execute()
-                self.supabase.client.table('terminal_transactions').select('*').limit(1).execute()
-                self.supabase.client.table('merchant_profiles').select('*').limit(1).execute()
+                await run_query(self.supabase.client.table('terminal_registry').select('*').limit(1))
+                await run_query(self.supabase.client.table('terminal_transactions').select('*').limit(1))
+                await run_query(self.supabase.client.table('merchant_profiles').select('*').limit(1))
                 logger.info("Terminal service database validation successful")
                 return True
         except Exception as e:
@@ -69,9 +69,9 @@ class TerminalService:
         """Create database tables for terminal data"""
         try:
             # Check if tables exist
-            self.supabase.client.table('terminal_registry').select('*').limit(1).execute()
-            self.supabase.client.table('terminal_transactions').select('*').limit(1).execute()
-            self.supabase.client.table('merchant_profiles').select('*').limit(1).execute()
+            await run_query(self.supabase.client.table('terminal_registry').select('*').limit(1))
+            await run_query(self.supabase.client.table('terminal_transactions').select('*').limit(1))
+            await run_query(self.supabase.client.table('merchant_profiles').select('*').limit(1))
         except:
             logger.info("Creating terminal tables")
             # In production, use proper database migrations
@@ -274,10 +274,10 @@ class TerminalService:
                 return {'found': False}
             
             # Query terminal registry
-            result = self.supabase.client.table('terminal_registry').select(
+            result = await run_query(self.supabase.client.table('terminal_registry').select(
                 'terminal_id, merchant_name, merchant_category, mcc, processor, '
                 'registration_date, last_active, location_city, location_state, confidence'
-            ).eq('terminal_id', terminal_id).execute()
+            ).eq('terminal_id', terminal_id))
             
             if result.data:
                 terminal_data = result.data[0]
@@ -324,10 +324,10 @@ class TerminalService:
             # Query recent transactions (last 90 days)
             cutoff_date = (datetime.now() - timedelta(days=90)).isoformat()
             
-            result = self.supabase.client.table('terminal_transactions').select(
+            result = await run_query(self.supabase.client.table('terminal_transactions').select(
                 'transaction_amount, transaction_time, predicted_mcc, confidence, '
                 'hour_of_day, day_of_week, has_tip'
-            ).eq('terminal_id', terminal_id).gte('transaction_time', cutoff_date).execute()
+            ).eq('terminal_id', terminal_id).gte('transaction_time', cutoff_date))
             
             if not result.data or len(result.data) < 5:  # Need minimum transactions for analysis
                 return {'analyzed': False, 'reason': 'insufficient_data'}
@@ -680,18 +680,12 @@ class TerminalService:
         if not terminal_id:
             return 0.0
         
-        # Calculate character frequency
-        char_counts = Counter(terminal_id)
-        total_chars = len(terminal_id)
+        # Character frequencies over code points, then entropy in one vectorized pass
+        code_points = np.frombuffer(terminal_id.encode('utf-32-le'), dtype=np.uint32)
+        _, char_counts = np.unique(code_points, return_counts=True)
+        probabilities = char_counts / len(terminal_id)
         
-        # Calculate entropy
-        entropy = 0.0
-        for count in char_counts.values():
-            probability = count / total_chars
-            if probability > 0:
-                entropy -= probability * np.log2(probability)
-        
-        return entropy
+        return float(-(probabilities * np.log2(probabilities)).sum())
     
     async def _get_cached_terminal_lookup(self, terminal_id: str) -> Optional[Dict[str, Any]]:
         """Get cached terminal lookup result"""
@@ -699,15 +693,15 @@ class TerminalService:
             if not self.supabase:
                 return None
             
-            result = self.supabase.client.table('terminal_cache').select('*').eq(
+            result = await run_query(self.supabase.client.table('terminal_cache').select('*').eq(
                 'terminal_id', terminal_id
-            ).order('created_at', desc=True).limit(1).execute()
+            ).order('created_at', desc=True).limit(1))
             
             if result.data:
                 cache_entry = result.data[0]
                 return {
                     'data': json.loads(cache_entry['lookup_data']),
-                    'cached_at': datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00'))
+                    'cached_at': datetime.fromisoformat(cache_entry['created_at'].replace('Z', '+00:00')).timestamp()
                 }
         
         except Exception as e:
@@ -717,8 +711,8 @@ class TerminalService:
     
     def _is_cache_valid(self, cached_result: Dict[str, Any]) -> bool:
         """Check if cached result is still valid"""
-        cached_at = cached_result['cached_at']
-        return datetime.now() - cached_at < self.cache_duration
+        # cached_at is epoch seconds, so no naive/aware datetime arithmetic is needed
+        return time.time() - cached_result['cached_at'] < self.cache_duration.total_seconds()
     
     def _enhance_cached_result(self, cached_result: Dict[str, Any], 
                              transaction_amount: Optional[float],
@@ -744,11 +738,11 @@ class TerminalService:
             if not self.supabase:
                 return
             
-            self.supabase.client.table('terminal_cache').upsert({
+            await run_query(self.supabase.client.table('terminal_cache').upsert({
                 'terminal_id': terminal_id,
                 'lookup_data': json.dumps(result),
                 'created_at': datetime.now().isoformat()
-            }).execute()
+            }))
             
         except Exception as e:
             logger.error(f"Error caching terminal lookup: {str(e)}")
@@ -773,7 +767,7 @@ class TerminalService:
                 'created_at': datetime.now().isoformat()
             }
             
-            self.supabase.client.table('terminal_transactions').insert(transaction_data).execute()
+            await run_query(self.supabase.client.table('terminal_transactions').insert(transaction_data))
             
         except Exception as e:
             logger.error(f"Error storing terminal transaction: {str(e)}")
@@ -815,7 +809,7 @@ class TerminalService:
                 'last_active': datetime.now().isoformat()
             }
             
-            self.supabase.client.table('terminal_registry').upsert(registration_data).execute()
+            await run_query(self.supabase.client.table('terminal_registry').upsert(registration_data))
             
             return {'success': True, 'terminal_id': terminal_id}
             
@@ -829,9 +823,9 @@ class TerminalService:
             if not self.supabase:
                 return
             
-            self.supabase.client.table('terminal_registry').update({
+            await run_query(self.supabase.client.table('terminal_registry').update({
                 'last_active': datetime.now().isoformat()
-            }).eq('terminal_id', terminal_id.strip().upper()).execute()
+            }).eq('terminal_id', terminal_id.strip().upper()))
             
         except Exception as e:
             logger.error(f"Error updating terminal activity: {str(e)}")
@@ -843,14 +837,14 @@ class TerminalService:
                 return {'error': 'Database not available'}
             
             # Get registry data
-            registry_result = self.supabase.client.table('terminal_registry').select('*').eq(
+            registry_result = await run_query(self.supabase.client.table('terminal_registry').select('*').eq(
                 'terminal_id', terminal_id.strip().upper()
-            ).execute()
+            ))
             
             # Get transaction statistics
-            transaction_result = self.supabase.client.table('terminal_transactions').select(
+            transaction_result = await run_query(self.supabase.client.table('terminal_transactions').select(
                 'transaction_amount, transaction_time, predicted_mcc, confidence'
-            ).eq('terminal_id', terminal_id.strip().upper()).execute()
+            ).eq('terminal_id', terminal_id.strip().upper()))
             
             registry_data = registry_result.data[0] if registry_result.data else {}
             transactions = transaction_result.data if transaction_result.data else []
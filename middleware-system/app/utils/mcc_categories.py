@@ -3,6 +3,8 @@ Comprehensive MCC Categories Utility
 Complete Stripe Issuing MCC category mappings for all business types
 """
 
+import functools
+
 # Complete Stripe Issuing MCC Categories Mapping
 MCC_CATEGORIES = {
     # Food & Dining
@@ -257,6 +259,9 @@ MCC_CATEGORIES = {
     "quick_copy": "7338", "blueprint": "7338"
 }
 
+# Reverse lookup: MCC code to the first category name that maps to it
+MCC_TO_CATEGORY = {mcc: category for category, mcc in reversed(MCC_CATEGORIES.items())}
+
 # Google Places types to MCC mapping - comprehensive coverage using full Stripe categories
 GOOGLE_PLACES_TO_MCC = {
     # Food & Dining - comprehensive Google Places food types
@@ -448,6 +453,8 @@ FOURSQUARE_CATEGORY_PATTERNS = {
     "wholesale": "5169", "supplier": "5169", "chemical": "5169"
 }
 
+# Lookups depend only on the static tables above, so repeated names skip the substring scans
+@functools.lru_cache(maxsize=4096)
 def get_mcc_for_category(category: str) -> str:
     """
     Get MCC code for a given category
@@ -475,6 +482,7 @@ def get_mcc_for_category(category: str) -> str:
     # Fallback to miscellaneous retail
     return "5999"
 
+@functools.lru_cache(maxsize=4096)
 def get_mcc_for_google_place_type(place_type: str) -> str:
     """
     Get MCC code for Google Places type using comprehensive mapping
@@ -502,6 +510,7 @@ def get_mcc_for_google_place_type(place_type: str) -> str:
     # Fall back to general category matching
     return get_mcc_for_category(place_type)
 
+@functools.lru_cache(maxsize=4096)
 def get_mcc_for_foursquare_category(category_name: str) -> str:
     """
     Get MCC code for Foursquare category using comprehensive mapping
@@ -534,6 +543,18 @@ def get_all_mcc_categories():
     """
     return MCC_CATEGORIES.copy()
 
+def get_category_for_mcc(mcc: str):
+    """
+    Get the category name for an MCC code
+    
+    Args:
+        mcc: The 4-digit MCC code
+        
+    Returns:
+        str: The matching category name, or None if the MCC is not mapped
+    """
+    return MCC_TO_CATEGORY.get(mcc)
+
 def search_mcc_categories(search_term: str, limit: int = 10):
     """
     Search for MCC categories by term
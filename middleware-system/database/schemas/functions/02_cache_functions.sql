@@ -282,4 +282,55 @@ BEGIN
         (SELECT AVG(confidence) FROM terminal_cache) as avg_terminal_confidence,
         (SELECT AVG(confidence) FROM location_cache) as avg_location_confidence;
 END;
-$$ LANGUAGE plpgsql SECURITY DEFINER; 
\ No newline at end of file
+$$ LANGUAGE plpgsql SECURITY DEFINER; 
+-- Function to get the actual MCC distribution over a terminal's recent transactions
+CREATE OR REPLACE FUNCTION terminal_mcc_distribution(p_terminal_id TEXT, p_lookback INTEGER DEFAULT 50)
+RETURNS TABLE (
+    mcc TEXT,
+    cnt INTEGER,
+    latest TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        recent.actual_mcc::TEXT,
+        COUNT(*)::INTEGER,
+        MAX(recent.created_at)
+    FROM (
+        SELECT tf.actual_mcc, tf.created_at
+        FROM transaction_feedback tf
+        WHERE tf.terminal_id = p_terminal_id
+        AND tf.actual_mcc IS NOT NULL
+        ORDER BY tf.created_at DESC
+        LIMIT p_lookback
+    ) recent
+    GROUP BY recent.actual_mcc
+    ORDER BY 2 DESC, 3 DESC;
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
+
+-- Function to get the actual MCC distribution over a location's recent transactions
+CREATE OR REPLACE FUNCTION location_mcc_distribution(p_location_hash TEXT, p_lookback INTEGER DEFAULT 20)
+RETURNS TABLE (
+    mcc TEXT,
+    cnt INTEGER,
+    latest TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        recent.actual_mcc::TEXT,
+        COUNT(*)::INTEGER,
+        MAX(recent.created_at)
+    FROM (
+        SELECT tf.actual_mcc, tf.created_at
+        FROM transaction_feedback tf
+        WHERE tf.location_hash = p_location_hash
+        AND tf.actual_mcc IS NOT NULL
+        ORDER BY tf.created_at DESC
+        LIMIT p_lookback
+    ) recent
+    GROUP BY recent.actual_mcc
+    ORDER BY 2 DESC, 3 DESC;
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
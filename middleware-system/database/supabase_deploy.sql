@@ -878,6 +878,61 @@ $$;
 GRANT EXECUTE ON FUNCTION get_user_by_email(text) TO authenticated;
 GRANT EXECUTE ON FUNCTION get_user_by_email(text) TO service_role;
 
+-- Function to get the actual MCC distribution over a terminal's recent transactions
+CREATE OR REPLACE FUNCTION terminal_mcc_distribution(p_terminal_id TEXT, p_lookback INTEGER DEFAULT 50)
+RETURNS TABLE (
+    mcc TEXT,
+    cnt INTEGER,
+    latest TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        recent.actual_mcc::TEXT,
+        COUNT(*)::INTEGER,
+        MAX(recent.created_at)
+    FROM (
+        SELECT tf.actual_mcc, tf.created_at
+        FROM transaction_feedback tf
+        WHERE tf.terminal_id = p_terminal_id
+        AND tf.actual_mcc IS NOT NULL
+        ORDER BY tf.created_at DESC
+        LIMIT p_lookback
+    ) recent
+    GROUP BY recent.actual_mcc
+    ORDER BY 2 DESC, 3 DESC;
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
+
+-- Function to get the actual MCC distribution over a location's recent transactions
+CREATE OR REPLACE FUNCTION location_mcc_distribution(p_location_hash TEXT, p_lookback INTEGER DEFAULT 20)
+RETURNS TABLE (
+    mcc TEXT,
+    cnt INTEGER,
+    latest TIMESTAMP WITH TIME ZONE
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        recent.actual_mcc::TEXT,
+        COUNT(*)::INTEGER,
+        MAX(recent.created_at)
+    FROM (
+        SELECT tf.actual_mcc, tf.created_at
+        FROM transaction_feedback tf
+        WHERE tf.location_hash = p_location_hash
+        AND tf.actual_mcc IS NOT NULL
+        ORDER BY tf.created_at DESC
+        LIMIT p_lookback
+    ) recent
+    GROUP BY recent.actual_mcc
+    ORDER BY 2 DESC, 3 DESC;
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
+
+GRANT EXECUTE ON FUNCTION terminal_mcc_distribution(text, integer) TO authenticated, anon, service_role;
+GRANT EXECUTE ON FUNCTION location_mcc_distribution(text, integer) TO authenticated, anon, service_role;
+
 -- =====================================================
 -- 6. Row Level Security Policies
 -- =====================================================
@@ -5,19 +5,26 @@ Runs the complete Payvo Middleware application with all services
 """
 
 import asyncio
+import atexit
 import logging
+import queue
 import sys
 import uvicorn
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # Add the current directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging - the event loop only enqueues records, a listener thread formats and writes them
+_log_queue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_stream_handler)
+logging.getLogger().addHandler(QueueHandler(_log_queue))
+logging.getLogger().setLevel(logging.INFO)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +41,7 @@ def main():
         logger.info(f"   Host: {settings.HOST}")
         logger.info(f"   Port: {settings.PORT}")
         logger.info(f"   Debug: {settings.DEBUG}")
+        logger.info(f"   Workers: {1 if settings.DEBUG else settings.WORKERS}")
         logger.info(f"   Supabase: {'✅ Configured' if settings.use_supabase else '❌ Not configured'}")
         
         logger.info(f"🌐 Access your application at:")
@@ -42,14 +50,18 @@ def main():
             logger.info(f"   Docs: http://{settings.HOST}:{settings.PORT}/docs")
             logger.info(f"   Health: http://{settings.HOST}:{settings.PORT}/api/v1/health")
         
-        # Run the server using import string
+        # Run the server using import string (required for multiple workers)
+        # uvloop + httptools come from uvicorn[standard]; reload mode is single-process
         uvicorn.run(
             "app.main:app",
             host=settings.HOST,
             port=settings.PORT,
+            loop="uvloop",
+            http="httptools",
+            workers=None if settings.DEBUG else max(1, settings.WORKERS),
             log_level="info" if settings.DEBUG else "warning",
             reload=settings.DEBUG,
-            access_log=True
+            access_log=settings.DEBUG
         )
         
     except KeyboardInterrupt:
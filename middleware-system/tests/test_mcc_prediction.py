@@ -0,0 +1,251 @@
+"""
+Tests for MCC prediction request coalescing, early cancellation and LLM micro-batching
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("openai")
+pytest.importorskip("sklearn")
+
+from app.api.route_modules import mcc_prediction as mcc
+from app.api.route_modules.mcc_prediction import MCCOrchestrator, MCCPredictionRequest
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    """Orchestrator with initialization and the Redis cache stubbed out"""
+    async def no_cache(key):
+        return None
+
+    async def no_write(key, value, ttl_seconds):
+        return True
+
+    async def initialized():
+        return None
+
+    monkeypatch.setattr(mcc, "cache_get_json", no_cache)
+    monkeypatch.setattr(mcc, "cache_set_json", no_write)
+    orchestrator = MCCOrchestrator()
+    monkeypatch.setattr(orchestrator, "initialize_services", initialized)
+    return orchestrator
+
+
+def _request(merchant_name, **kwargs):
+    return MCCPredictionRequest(
+        latitude=37.7895, longitude=-122.4089, merchant_name=merchant_name,
+        use_llm_enhancement=False, **kwargs
+    )
+
+
+def _prediction(mcc_code, confidence=0.6, method="location_analysis"):
+    return {"mcc": mcc_code, "confidence": confidence, "method": method}
+
+
+MCC_BY_MERCHANT = {"cafe": "5814", "grocer": "5411", "gas": "5541"}
+
+
+def _stub_gather(monkeypatch, orchestrator, gate=None):
+    """Replace the service fan-out with one that answers by merchant name, counting calls"""
+    calls = []
+
+    async def gather(request, with_llm=False):
+        calls.append(request.merchant_name)
+        if gate is not None:
+            await gate.wait()
+        return [_prediction(MCC_BY_MERCHANT[request.merchant_name])]
+
+    monkeypatch.setattr(orchestrator, "_gather_predictions", gather)
+    return calls
+
+
+def test_concurrent_identical_predictions_share_one_run(orchestrator, monkeypatch):
+    async def scenario():
+        gate = asyncio.Event()
+        calls = _stub_gather(monkeypatch, orchestrator, gate)
+
+        waiters = [
+            asyncio.ensure_future(orchestrator.predict_mcc(_request(name)))
+            for name in ("cafe", "grocer", "cafe", "cafe")
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        responses = await asyncio.gather(*waiters)
+
+        assert sorted(calls) == ["cafe", "grocer"]
+        assert [r.predicted_mcc for r in responses] == ["5814", "5411", "5814", "5814"]
+        assert responses[0] is responses[2] is responses[3]
+        assert not orchestrator._inflight
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_waiter_keeps_shared_prediction(orchestrator, monkeypatch):
+    async def scenario():
+        gate = asyncio.Event()
+        calls = _stub_gather(monkeypatch, orchestrator, gate)
+
+        first = asyncio.ensure_future(orchestrator.predict_mcc(_request("cafe")))
+        second = asyncio.ensure_future(orchestrator.predict_mcc(_request("cafe")))
+        await asyncio.sleep(0)
+        shared = next(iter(orchestrator._inflight.values()))
+
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        response = await second
+
+        assert first.cancelled()
+        assert not shared.cancelled()
+        assert response.predicted_mcc == "5814"
+        assert calls == ["cafe"]
+
+    asyncio.run(scenario())
+
+
+def test_decisive_source_cancels_the_rest_of_the_fan_out(orchestrator, monkeypatch):
+    async def scenario():
+        historical_cancelled = asyncio.Event()
+
+        async def location(request):
+            return _prediction("5812", confidence=0.95)
+
+        async def historical(request):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                historical_cancelled.set()
+                raise
+
+        monkeypatch.setattr(orchestrator, "_safe_predict_location", location)
+        monkeypatch.setattr(orchestrator, "_safe_predict_historical", historical)
+
+        predictions = await asyncio.wait_for(orchestrator._gather_predictions(_request("cafe")), 1)
+
+        assert predictions == [_prediction("5812", confidence=0.95)]
+        assert historical_cancelled.is_set()
+
+    asyncio.run(scenario())
+
+
+def _stub_llm(monkeypatch, batch_sizes, fail=False, block=None):
+    """Replace the LLM service with one that records batch sizes"""
+    async def enhance_batch(merchants, existing_predictions, contexts):
+        batch_sizes.append(len(merchants))
+        if block is not None:
+            await block.wait()
+        if fail:
+            raise RuntimeError("completion failed")
+        return [{"enhancement_applied": True, "merchant": m["merchant_name"]} for m in merchants]
+
+    async def enhance_single(merchant_data, existing_predictions, context):
+        result, = await enhance_batch([merchant_data], [existing_predictions], [context])
+        return result
+
+    monkeypatch.setattr(mcc.llm_service, "enhance_mcc_prediction_batch", enhance_batch)
+    monkeypatch.setattr(mcc.llm_service, "enhance_mcc_prediction", enhance_single)
+
+
+def _enhance(orchestrator, merchant_name):
+    return orchestrator._apply_llm_enhancement(_request(merchant_name), [_prediction("5999")])
+
+
+def test_llm_batch_flushes_when_full(orchestrator, monkeypatch):
+    async def scenario():
+        batch_sizes = []
+        _stub_llm(monkeypatch, batch_sizes)
+        # A window this long would fail the timeout, so only a full batch can flush
+        monkeypatch.setattr(mcc, "_LLM_BATCH_WINDOW_SECONDS", 60)
+
+        names = [f"merchant {i}" for i in range(mcc._LLM_BATCH_MAX)]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(_enhance(orchestrator, name) for name in names)), 1
+        )
+
+        assert batch_sizes == [mcc._LLM_BATCH_MAX]
+        assert [r["merchant"] for r in results] == names
+        assert orchestrator._llm_flush_handle is None
+
+    asyncio.run(scenario())
+
+
+def test_llm_batch_flushes_when_window_expires(orchestrator, monkeypatch):
+    async def scenario():
+        batch_sizes = []
+        _stub_llm(monkeypatch, batch_sizes)
+        monkeypatch.setattr(mcc, "_LLM_BATCH_WINDOW_SECONDS", 0.01)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(_enhance(orchestrator, name) for name in ("a", "b", "c"))), 1
+        )
+        single = await asyncio.wait_for(_enhance(orchestrator, "d"), 1)
+
+        assert batch_sizes == [3, 1]
+        assert [r["merchant"] for r in results] == ["a", "b", "c"]
+        assert single["merchant"] == "d"
+
+    asyncio.run(scenario())
+
+
+def test_failed_llm_batch_fails_every_caller(orchestrator, monkeypatch):
+    async def scenario():
+        _stub_llm(monkeypatch, [], fail=True)
+        monkeypatch.setattr(mcc, "_LLM_BATCH_WINDOW_SECONDS", 0.01)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(_enhance(orchestrator, "a"), _enhance(orchestrator, "b")), 1
+        )
+
+        assert all(r["enhancement_applied"] is False for r in results)
+        assert all("completion failed" in r["error"] for r in results)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_llm_batch_cancels_every_caller(orchestrator, monkeypatch):
+    async def scenario():
+        block = asyncio.Event()
+        _stub_llm(monkeypatch, [], block=block)
+        monkeypatch.setattr(mcc, "_LLM_BATCH_WINDOW_SECONDS", 0.01)
+
+        callers = [asyncio.ensure_future(_enhance(orchestrator, name)) for name in ("a", "b")]
+        while not orchestrator._llm_batches:
+            await asyncio.sleep(0.005)
+        batch_task, = orchestrator._llm_batches
+        batch_task.cancel()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert all(isinstance(r, asyncio.CancelledError) for r in results)
+
+    asyncio.run(scenario())
+
+
+def test_predict_batch_keeps_input_order_across_hits_and_misses(orchestrator, monkeypatch):
+    async def scenario():
+        calls = _stub_gather(monkeypatch, orchestrator)
+
+        local_hit = _request("grocer")
+        orchestrator._local_put(
+            orchestrator._cache_key(local_hit),
+            orchestrator._build_response(local_hit, [_prediction("5411")], 0, None)
+        )
+        redis_hit = _request("gas")
+        redis_payload = orchestrator._build_response(redis_hit, [_prediction("5541")], 0, None).model_dump()
+
+        async def redis_get(key):
+            return redis_payload if key == orchestrator._cache_key(redis_hit) else None
+
+        monkeypatch.setattr(mcc, "cache_get_json", redis_get)
+
+        requests = [_request("cafe"), local_hit, _request("cafe", radius=50), redis_hit]
+        responses = await orchestrator.predict_batch(requests)
+
+        assert [r.predicted_mcc for r in responses] == ["5814", "5411", "5814", "5541"]
+        assert calls == ["cafe", "cafe"]
+        _, cached = orchestrator._local_cache[orchestrator._cache_key(local_hit)]
+        assert responses[1] is not cached
+
+    asyncio.run(scenario())
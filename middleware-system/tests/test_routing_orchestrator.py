@@ -0,0 +1,24 @@
+"""
+Tests for the routing orchestrator's simulated payment context
+"""
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("numpy")
+
+from app.services.routing_orchestrator import RoutingOrchestrator
+
+
+def test_generate_realistic_payment_context_without_real_location():
+    orchestrator = RoutingOrchestrator.__new__(RoutingOrchestrator)
+    session = {"session_id": "session-123", "user_id": "user-1"}
+
+    context = orchestrator._generate_realistic_payment_context(session)
+
+    info = context["context_info"]
+    assert 0 <= info["time_of_day"] <= 23
+    assert 0 <= info["day_of_week"] <= 6
+    assert info["simulation_mode"] is True
+    assert context["location"]["source"] == "test_fallback"
+    assert context["session_id"] == "session-123"